@@ -0,0 +1,237 @@
+import threading
+from collections import OrderedDict
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from evaluation import Evaluation
+
+# Analysis frame length; long enough to hold two pitch periods of a low voice
+FRAME_SECONDS = 0.03
+# Pitch search range (Hz) and minimum normalized autocorrelation for a frame to count as voiced
+MIN_PITCH = 70.0
+MAX_PITCH = 400.0
+MIN_PERIODICITY = 0.35
+# A syllable nucleus is an energy peak at least this much above the dip before it (~3 dB)
+SYLLABLE_PROMINENCE = 1.41
+# Frames louder than this (RMS) or the utterance's noise floor times ONSET_RATIO count as speech
+MIN_ENERGY = 300.0
+ONSET_RATIO = 3.0
+# Less voiced audio than this is too little to judge fluency from
+MIN_VOICED_SECONDS = 0.3
+# Speech rate (syllables per second, pauses included) that counts as fluent for a learner
+FLUENT_RATE = (2.5, 5.5)
+
+
+class AcousticFeatures:
+    """Prosodic measurements of one utterance"""
+    __slots__ = ("duration", "speech_seconds", "active_seconds", "voiced_seconds", "syllables", "speech_rate",
+                 "pause_ratio", "pitch_mean", "pitch_variance", "energy_contour")
+
+    def __init__(self, duration: float, speech_seconds: float, active_seconds: float, voiced_seconds: float,
+                 syllables: int, pitch_mean: float, pitch_variance: float, energy_contour: np.ndarray):
+        self.duration = duration
+        self.speech_seconds = speech_seconds      # First to last speech frame
+        self.active_seconds = active_seconds      # Speech frames; the rest of the span is pauses
+        self.voiced_seconds = voiced_seconds      # Speech frames with a pitch
+        self.syllables = syllables
+        self.speech_rate = syllables / speech_seconds if speech_seconds else 0.0
+        self.pause_ratio = 1.0 - active_seconds / speech_seconds if speech_seconds else 0.0
+        self.pitch_mean = pitch_mean              # Hz
+        self.pitch_variance = pitch_variance      # Semitones squared
+        self.energy_contour = energy_contour      # dB per frame
+
+    def contour(self, resolution: float = 0.1) -> List[float]:
+        """Energy contour averaged down to one value per resolution seconds"""
+        step = max(1, int(round(resolution / FRAME_SECONDS)))
+        usable = self.energy_contour.size // step * step
+        if not usable:
+            return []
+        return np.round(self.energy_contour[:usable].reshape(-1, step).mean(axis=1), 1).tolist()
+
+    def to_dict(self) -> Dict:
+        return {
+            "duration": round(self.duration, 2),
+            "speech_rate": round(self.speech_rate, 2),
+            "pause_ratio": round(self.pause_ratio, 3),
+            "pitch_mean": round(self.pitch_mean, 1),
+            "pitch_variance": round(self.pitch_variance, 2),
+            "syllables": self.syllables,
+            "energy_contour": self.contour(),
+        }
+
+
+class AcousticStream:
+    """Incremental analysis of one utterance.
+
+    update() is handed the audio captured so far (each call a longer prefix of the
+    same utterance) and only analyzes the samples it has not seen yet, in whole
+    frames, so most of the work is done while the learner is still speaking.
+    Samples are read straight out of the AudioData buffer with np.frombuffer.
+    """
+
+    def __init__(self, threshold: Optional[float] = None):
+        self.threshold = threshold   # Fixed speech threshold, or None to derive one from the audio
+        self.sample_rate = None
+        self.frame_size = 0
+        self._consumed = 0           # Samples analyzed so far
+        self._floor = np.inf         # Quietest frame seen (noise floor estimate)
+        self._energies: List[np.ndarray] = []
+        self._frames = 0
+        self._first_speech = None
+        self._last_speech = None
+        self._active = 0             # Speech frames
+        self._voiced = 0             # Speech frames with a pitch
+        self._syllables = 0
+        self._valley = np.inf        # Lowest energy since the last syllable peak
+        self._tail = np.zeros(0, dtype=np.float32)  # Last frames, for peaks across updates
+        self._tail_speech = np.zeros(0, dtype=bool)
+        self._pitch_count = 0
+        self._pitch_sum = 0.0        # Of semitones relative to 100 Hz
+        self._pitch_sum_squares = 0.0
+
+    def update(self, audio) -> "AcousticStream":
+        """Analyze the new whole frames of audio (an sr.AudioData prefix of the utterance)"""
+        if self.sample_rate is None:
+            self.sample_rate = audio.sample_rate
+            self.frame_size = int(FRAME_SECONDS * audio.sample_rate)
+        if audio.sample_width == 2:
+            data = memoryview(audio.frame_data)
+        else:
+            data = memoryview(audio.get_raw_data(convert_width=2))
+        total = len(data) // 2
+        frames = (total - self._consumed) // self.frame_size
+        if frames <= 0:
+            return self
+        end = self._consumed + frames * self.frame_size
+        samples = np.frombuffer(data[self._consumed * 2:end * 2], dtype=np.int16)
+        self._consumed = end
+        self._process(samples.reshape(frames, self.frame_size).astype(np.float32))
+        return self
+
+    def _process(self, frames: np.ndarray):
+        energy = np.sqrt(np.mean(frames ** 2, axis=1))
+        self._floor = min(self._floor, float(energy.min()))
+        threshold = self.threshold or max(MIN_ENERGY, self._floor * ONSET_RATIO)
+        speech = energy > threshold
+        periodic = np.zeros(len(frames), dtype=bool)
+        if speech.any():
+            periodic[speech] = self._pitch(frames[speech])
+
+        indices = np.flatnonzero(speech) + self._frames
+        if indices.size:
+            if self._first_speech is None:
+                self._first_speech = int(indices[0])
+            self._last_speech = int(indices[-1])
+        self._active += int(indices.size)
+        self._voiced += int(periodic.sum())
+        self._count_syllables(energy, speech)
+        self._energies.append(20 * np.log10(energy + 1.0))
+        self._frames += len(frames)
+
+    def _pitch(self, frames: np.ndarray) -> np.ndarray:
+        """Autocorrelation pitch of each frame; adds it to the running statistics, returns which were periodic"""
+        size = frames.shape[1]
+        lowest = int(self.sample_rate / MAX_PITCH)
+        highest = min(size - 1, int(self.sample_rate / MIN_PITCH))
+        centered = frames - frames.mean(axis=1, keepdims=True)
+        spectrum = np.fft.rfft(centered, n=2 * size, axis=1)
+        correlation = np.fft.irfft(spectrum.real ** 2 + spectrum.imag ** 2, axis=1)[:, :highest + 1]
+        lags = np.argmax(correlation[:, lowest:], axis=1) + lowest
+        strength = correlation[np.arange(len(frames)), lags] / np.maximum(correlation[:, 0], 1e-9)
+        periodic = strength >= MIN_PERIODICITY
+        if periodic.any():
+            semitones = 12 * np.log2(self.sample_rate / lags[periodic] / 100.0)
+            self._pitch_count += int(semitones.size)
+            self._pitch_sum += float(semitones.sum())
+            self._pitch_sum_squares += float((semitones ** 2).sum())
+        return periodic
+
+    def _count_syllables(self, energy: np.ndarray, speech: np.ndarray):
+        # Peaks need a neighbour on each side, so the last two frames wait for the next update
+        values = np.concatenate((self._tail, energy))
+        is_speech = np.concatenate((self._tail_speech, speech))
+        middle = values[1:-1]
+        peaks = np.flatnonzero((middle > values[:-2]) & (middle >= values[2:]) & is_speech[1:-1]) + 1
+        position = 0
+        for peak in peaks:
+            if peak > position:
+                self._valley = min(self._valley, float(values[position:peak].min()))
+            if values[peak] >= self._valley * SYLLABLE_PROMINENCE:
+                self._syllables += 1
+                self._valley = np.inf
+            position = peak + 1
+        if position < len(values) - 1:
+            self._valley = min(self._valley, float(values[position:-1].min()))
+        self._tail = values[-2:]
+        self._tail_speech = is_speech[-2:]
+
+    def features(self) -> AcousticFeatures:
+        frame = FRAME_SECONDS
+        span = self._last_speech - self._first_speech + 1 if self._first_speech is not None else 0
+        if self._pitch_count:
+            mean = self._pitch_sum / self._pitch_count
+            variance = max(0.0, self._pitch_sum_squares / self._pitch_count - mean ** 2)
+            pitch_mean = 100.0 * 2 ** (mean / 12)
+        else:
+            variance = pitch_mean = 0.0
+        contour = np.concatenate(self._energies) if self._energies else np.zeros(0, dtype=np.float32)
+        return AcousticFeatures(self._frames * frame, span * frame, self._active * frame, self._voiced * frame,
+                                self._syllables, pitch_mean, variance, contour)
+
+
+class AcousticAnalyzer:
+    """Evaluation analyzer that scores fluency from the utterance audio in context["audio"].
+
+    Live capture streams each utterance through an AcousticStream and hands the
+    result over with finish(), so evaluating it costs only the scoring; audio that
+    arrives without a stream (replays, tests) is analyzed in one pass.
+    """
+
+    def __init__(self, cache_size: int = 8):
+        self.cache_size = cache_size
+        self._finished = OrderedDict()  # id(audio) -> (audio, features)
+        self._lock = threading.Lock()
+
+    def finish(self, stream: AcousticStream, audio) -> AcousticFeatures:
+        """Analyze the rest of the final audio and keep the result for its evaluation"""
+        features = stream.update(audio).features()
+        with self._lock:
+            self._finished[id(audio)] = (audio, features)
+            while len(self._finished) > self.cache_size:
+                self._finished.popitem(last=False)
+        return features
+
+    def features(self, audio) -> AcousticFeatures:
+        with self._lock:
+            entry = self._finished.pop(id(audio), None)
+        if entry is not None and entry[0] is audio:
+            return entry[1]
+        return AcousticStream().update(audio).features()
+
+    def __call__(self, user_input: str, evaluation: Evaluation, context: Dict):
+        audio = context.get("audio")
+        if audio is None:
+            return
+        features = self.features(audio)
+        evaluation.details["acoustics"] = features.to_dict()
+        if features.voiced_seconds < MIN_VOICED_SECONDS:
+            return  # Keep the transcript-based fluency estimate
+
+        low, high = FLUENT_RATE
+        rate = features.speech_rate
+        rate_score = 100 - 25 * max(low - rate, rate - high, 0.0)
+        pause_score = 100 - 120 * features.pause_ratio
+        pitch_spread = features.pitch_variance ** 0.5
+        intonation_score = 100 if pitch_spread >= 1.0 else 60 + 40 * pitch_spread
+        score = 0.4 * rate_score + 0.4 * pause_score + 0.2 * intonation_score
+        evaluation.fluency = int(min(95, max(40, round(score))))
+
+        if features.pause_ratio > 0.35:
+            evaluation.feedback.append("Try to speak with fewer long pauses")
+        if rate < low:
+            evaluation.feedback.append("Try speaking a little faster and more smoothly")
+        elif rate > high + 1:
+            evaluation.feedback.append("Slow down a little so every word is clear")
+        if pitch_spread < 1.0 and features.voiced_seconds > 1.0:
+            evaluation.feedback.append("Vary your intonation to sound more natural")
@@ -0,0 +1,201 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+import speech_recognition as sr
+
+
+class CaptureCancelled(Exception):
+    """listen() was abandoned through its cancel event"""
+
+
+class MicrophoneCapture(threading.Thread):
+    """Long-lived capture thread that keeps the microphone open.
+
+    Audio is written into a preallocated ring buffer while an energy-based voice
+    activity detector tracks a rolling noise floor. Utterances are cut straight out
+    of the buffer (with a short pre-roll so the first syllable is kept), so a turn
+    never has to reopen the device or recalibrate.
+    """
+
+    def __init__(self, microphone: sr.Microphone, buffer_seconds: float = 30.0,
+                 calibration_seconds: float = 1.0, pre_roll: float = 0.3, max_lookback: float = 1.0,
+                 onset_ratio: float = 3.0, min_energy: float = 300.0, onset_chunks: int = 2,
+                 hangover: float = 0.8, noise_adapt_seconds: float = 5.0,
+                 on_speech_start: Optional[Callable[[], None]] = None):
+        super().__init__(daemon=True)
+        self.microphone = microphone
+        self.buffer_seconds = buffer_seconds
+        self.calibration_seconds = calibration_seconds
+        self.pre_roll = pre_roll
+        self.max_lookback = max_lookback
+        self.onset_ratio = onset_ratio
+        self.min_energy = min_energy
+        self.onset_chunks = onset_chunks
+        self.hangover = hangover
+        self.noise_adapt_seconds = noise_adapt_seconds
+        self.on_speech_start = on_speech_start
+
+        self.ready = threading.Event()       # Stream is open and the buffer allocated
+        self.calibrated = threading.Event()  # Initial noise floor has been measured
+        self.error = None
+        self.sample_rate = None
+        self.sample_width = None
+        self.noise_floor = 0.0
+        self.energy = 0.0
+
+        self._stop_event = threading.Event()
+        self._condition = threading.Condition()
+        self._buffer = None
+        self._total = 0                  # Samples written since the stream opened
+        self._in_speech = False
+        self._loud_chunks = 0
+        self._silent_samples = 0
+        self._onsets = 0                 # Number of speech segments started so far
+        self._segments = OrderedDict()   # Segment number -> [start sample, end sample or None]
+
+    def stop(self):
+        self._stop_event.set()
+
+    @property
+    def threshold(self) -> float:
+        """Energy above which a chunk counts as speech"""
+        return max(self.min_energy, self.noise_floor * self.onset_ratio)
+
+    def run(self):
+        try:
+            with self.microphone as source:
+                self.sample_rate = source.SAMPLE_RATE
+                self.sample_width = source.SAMPLE_WIDTH
+                self._buffer = np.zeros(int(self.buffer_seconds * self.sample_rate), dtype=np.int16)
+                self.ready.set()
+                while not self._stop_event.is_set():
+                    data = source.stream.read(source.CHUNK)
+                    self._process(np.frombuffer(data, dtype=np.int16))
+        except Exception as e:
+            self.error = e
+            print(f"Microphone capture error: {e}")
+        finally:
+            self.ready.set()
+            with self._condition:
+                self._condition.notify_all()
+
+    def _process(self, samples: np.ndarray):
+        with self._condition:
+            chunk_start = self._total
+            self._write(samples)
+        energy = float(np.sqrt(np.mean(samples.astype(np.float32) ** 2))) if samples.size else 0.0
+        self.energy = energy
+
+        if not self.calibrated.is_set():
+            # Average the energy over the calibration window for the initial floor
+            calibration_samples = self.calibration_seconds * self.sample_rate
+            weight = samples.size / max(1, self._total)
+            self.noise_floor += (energy - self.noise_floor) * weight
+            if self._total >= calibration_samples:
+                self.calibrated.set()
+            return
+
+        speech_started = False
+        with self._condition:
+            if energy > self.threshold:
+                self._loud_chunks += 1
+                self._silent_samples = 0
+                if not self._in_speech and self._loud_chunks >= self.onset_chunks:
+                    onset = chunk_start - (self.onset_chunks - 1) * samples.size
+                    self._in_speech = True
+                    self._onsets += 1
+                    self._segments[self._onsets] = [max(0, onset - int(self.pre_roll * self.sample_rate)), None]
+                    while len(self._segments) > 16:
+                        self._segments.popitem(last=False)
+                    speech_started = True
+            else:
+                self._loud_chunks = 0
+                if self._in_speech:
+                    self._silent_samples += samples.size
+                    if self._silent_samples >= self.hangover * self.sample_rate:
+                        self._segments[self._onsets][1] = self._total
+                        self._in_speech = False
+                else:
+                    # Rolling noise-floor estimate, only adapted outside speech
+                    alpha = samples.size / (self.noise_adapt_seconds * self.sample_rate)
+                    self.noise_floor += (energy - self.noise_floor) * alpha
+            self._condition.notify_all()
+
+        if speech_started and self.on_speech_start:
+            self.on_speech_start()
+
+    def _write(self, samples: np.ndarray):
+        capacity = self._buffer.size
+        position = self._total % capacity
+        first = min(samples.size, capacity - position)
+        self._buffer[position:position + first] = samples[:first]
+        if first < samples.size:
+            self._buffer[:samples.size - first] = samples[first:]
+        self._total += samples.size
+
+    def _read(self, start: int, end: int) -> np.ndarray:
+        capacity = self._buffer.size
+        start = max(start, self._total - capacity, 0)
+        if end <= start:
+            return np.zeros(0, dtype=np.int16)
+        indices = np.arange(start, end) % capacity
+        return self._buffer[indices]
+
+    @property
+    def is_speaking(self) -> bool:
+        return self._in_speech
+
+    def listen(self, timeout: float = 15, phrase_time_limit: float = 10,
+               on_partial: Optional[Callable[[sr.AudioData], None]] = None,
+               partial_interval: float = 1.0, cancel: Optional[threading.Event] = None) -> sr.AudioData:
+        """Return the next utterance from the buffer.
+
+        Speech that is already in progress when this is called is included, so a user
+        who starts talking just before pressing SPACE is not clipped. While the
+        utterance is still going, on_partial receives the audio so far every
+        partial_interval seconds (outside the buffer lock). Raises
+        sr.WaitTimeoutError if no speech starts within timeout seconds, and
+        CaptureCancelled as soon as cancel is set, so an abandoned turn doesn't
+        swallow the next utterance.
+        """
+        if not self.ready.wait(timeout) or self.error:
+            raise RuntimeError(f"Microphone not available: {self.error}")
+
+        with self._condition:
+            armed_at = self._total
+            target = self._onsets if self._in_speech else self._onsets + 1
+
+            deadline = time.monotonic() + timeout
+            while target not in self._segments:
+                if cancel is not None and cancel.is_set():
+                    raise CaptureCancelled()
+                remaining = deadline - time.monotonic()
+                if remaining <= 0 or self.error or not self.is_alive():
+                    raise sr.WaitTimeoutError("listening timed out while waiting for phrase to start")
+                self._condition.wait(min(remaining, 0.1))
+
+            segment = self._segments[target]
+            start = max(segment[0], armed_at - int(self.max_lookback * self.sample_rate))
+            limit = start + int(phrase_time_limit * self.sample_rate)
+
+        next_partial = time.monotonic() + partial_interval
+        while True:
+            with self._condition:
+                while segment[1] is None and self._total < limit and self.is_alive():
+                    if cancel is not None and cancel.is_set():
+                        raise CaptureCancelled()
+                    if on_partial and time.monotonic() >= next_partial:
+                        break
+                    self._condition.wait(0.1)
+                finished = segment[1] is not None or self._total >= limit or not self.is_alive()
+                end = min(segment[1] if segment[1] is not None else self._total, limit)
+                frames = self._read(start, end)
+            if finished:
+                break
+            next_partial = time.monotonic() + partial_interval
+            on_partial(sr.AudioData(frames.tobytes(), self.sample_rate, self.sample_width))
+
+        return sr.AudioData(frames.tobytes(), self.sample_rate, self.sample_width)
@@ -0,0 +1,130 @@
+"""Headless batch re-scoring of archived learner utterances.
+
+Reads JSONL transcripts (one utterance per line), scores them in NumPy-vectorized
+batches across a process pool and streams the results back out as JSONL, so memory
+stays bounded no matter how large the corpus is. Scores match
+evaluation.ResponseEvaluator without analyzers.
+
+    python batch_score.py transcripts.jsonl -o scores.jsonl --workers 8
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+from typing import Dict, Iterator, List
+
+import numpy as np
+
+from evaluation import FEEDBACK_RULES, context_score, rubric_scores, text_features
+
+
+def score_texts(texts: List[str]) -> List[Dict]:
+    """Score a batch of utterances; equivalent to ResponseEvaluator.evaluate for each text"""
+    if not texts:
+        return []
+    # Features are extracted per text; the rubric then runs once over whole columns
+    rows = [text_features(text) for text in texts]
+    features = {name: np.fromiter((row[name] for row in rows), dtype=type(value), count=len(rows))
+                for name, value in rows[0].items()}
+    scores = {name: column.tolist() for name, column in rubric_scores(features, np.minimum).items()}
+    flags = [(message, rule(features)) for message, rule in FEEDBACK_RULES]
+
+    results = []
+    for i, text in enumerate(texts):
+        result = {name: column[i] for name, column in scores.items()}
+        result["context_appropriateness"] = context_score(text)
+        result["feedback"] = [message for message, flag in flags if flag[i]]
+        results.append(result)
+    return results
+
+
+def score_batch(lines: List[str], field: str) -> List[str]:
+    """Parse, score and re-serialize a batch of JSONL lines (runs in a worker process)"""
+    records = []
+    failed = []  # Lines that can't be scored are written back with an error instead
+    for line in lines:
+        try:
+            record = json.loads(line)
+        except ValueError:
+            records.append({"error": "invalid JSON", "line": line})
+            failed.append(True)
+            continue
+        if isinstance(record, dict):
+            records.append(record)
+            failed.append(False)
+        else:
+            records.append({"error": "expected a JSON object", "value": record})
+            failed.append(True)
+    texts = ["" if bad else str(record.get(field, "")) for record, bad in zip(records, failed)]
+    scores = score_texts(texts)
+
+    output = []
+    for record, bad, evaluation in zip(records, failed, scores):
+        if not bad:
+            record["evaluation"] = evaluation
+        output.append(json.dumps(record, ensure_ascii=False))
+    return output
+
+
+def read_batches(stream, batch_size: int) -> Iterator[List[str]]:
+    """Yield lists of non-empty lines without reading the whole stream"""
+    lines = (line.rstrip("\n") for line in stream if line.strip())
+    while True:
+        batch = list(islice(lines, batch_size))
+        if not batch:
+            return
+        yield batch
+
+
+def run(source, sink, field: str = "text", batch_size: int = 10000, workers: int = None) -> int:
+    """Score every utterance from source into sink; returns the number of records written"""
+    workers = workers or os.cpu_count() or 1
+    written = 0
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        # Keep a bounded number of batches in flight and write them back in input order
+        max_pending = workers * 2
+        pending = deque()
+        for batch in read_batches(source, batch_size):
+            pending.append(executor.submit(score_batch, batch, field))
+            while len(pending) >= max_pending:
+                written += write_batch(sink, pending.popleft().result())
+        while pending:
+            written += write_batch(sink, pending.popleft().result())
+    return written
+
+
+def write_batch(sink, lines: List[str]) -> int:
+    sink.write("\n".join(lines) + "\n")
+    sink.flush()
+    return len(lines)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-score archived learner utterances from JSONL transcripts")
+    parser.add_argument("input", help="JSONL transcript file, or - for stdin")
+    parser.add_argument("-o", "--output", default="-", help="JSONL output file, or - for stdout (default)")
+    parser.add_argument("--field", default="text", help="Record field holding the utterance (default: text)")
+    parser.add_argument("--batch-size", type=int, default=10000, help="Utterances per vectorized batch")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args(argv)
+
+    source = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    sink = sys.stdout if args.output == "-" else open(args.output, "w", encoding="utf-8")
+    start = time.perf_counter()
+    try:
+        written = run(source, sink, args.field, args.batch_size, args.workers)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+    elapsed = time.perf_counter() - start
+    print(f"Scored {written} utterances in {elapsed:.1f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""Headless performance benchmarks for the desktop app.
+
+Runs LanguageLearningVR under SDL's dummy video/audio drivers with stubbed speech
+components (a silent TTS engine, canned microphone clips and an offline recognizer),
+so no display, microphone, TTS voice or network is needed. Measures UI frame time
+against history length, response generation against scenario size, evaluation
+throughput and end-to-end turn latency through conversation_loop. Results are JSON;
+--compare flags results that got worse than a baseline by more than --threshold.
+
+    python benchmark.py -o baseline.json
+    python benchmark.py -o current.json --compare baseline.json
+    python benchmark.py --compare baseline.json current.json --threshold 0.15
+"""
+import os
+
+# Must be set before pygame is imported (by main)
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+import argparse
+import contextlib
+import json
+import platform
+import sys
+import tempfile
+import time
+from typing import Callable, Dict, List
+
+import numpy as np
+import pygame
+import speech_recognition as sr
+
+from history_store import HistoryRecord
+from keyword_matcher import KeywordMatcher
+from main import LanguageLearningVR
+from metrics import RollingHistogram
+from recognition import ConcurrentRecognizer, OfflineBackend
+
+BENCHMARKS = ("frame", "respond", "evaluate", "turn")
+# History lengths the frame benchmark renders with
+FRAME_HISTORY_SIZES = [0, 10, 100, 1000, 10000]
+
+UTTERANCES = [
+    "Hello",
+    "Can I see the menu please",
+    "I would like to order the coq au vin and a glass of red wine",
+    "Could you tell me more about the role and the team I would be working with",
+    "Excuse me, how much does this jacket cost and do you have it in a larger size",
+    "Thank you so much, that was delicious. Could we have the bill please",
+    "I'm not sure",
+    "My greatest strength is that I stay calm under pressure and I like solving problems with other people",
+]
+
+
+class CannedCapture:
+    """MicrophoneCapture stand-in that hands out prepared clips in order"""
+    is_speaking = False
+    threshold = None  # Derive the speech threshold from each clip
+
+    def __init__(self, clips: List[sr.AudioData]):
+        self.clips = clips
+        self._next = 0
+
+    def listen(self, timeout: float = 15, phrase_time_limit: float = 10,
+               on_partial=None, partial_interval: float = 1.0, cancel=None) -> sr.AudioData:
+        clip = self.clips[self._next % len(self.clips)]
+        self._next += 1
+        return clip
+
+    def stop(self):
+        pass
+
+
+def synthetic_clip(seed: int, seconds: float = 1.0, sample_rate: int = 16000) -> sr.AudioData:
+    """A distinct clip of noise (content is irrelevant to the offline recognizer)"""
+    samples = np.random.default_rng(seed).integers(-2000, 2000, int(seconds * sample_rate), dtype=np.int16)
+    return sr.AudioData(samples.tobytes(), sample_rate, 2)
+
+
+def synthetic_scenario(keyword_count: int, keywords_per_intent: int = 5) -> Dict:
+    """Scenario with keyword_count keywords (single words and two-word phrases) over many intents"""
+    responses = {"default": "I see. Is there anything else I can help you with today?"}
+    keywords = {}
+    for n in range(keyword_count):
+        intent = f"intent{n // keywords_per_intent}"
+        responses.setdefault(intent, f"Response for {intent}.")
+        keyword = f"word{n}" if n % 3 else f"phrase{n} part{n}"
+        keywords.setdefault(intent, []).append(keyword)
+    return {"id": f"synthetic{keyword_count}", "name": "Synthetic", "language": "en-US",
+            "responses": responses, "keywords": keywords}
+
+
+def summarize(samples: List[float]) -> Dict:
+    """p50/p95/p99 and mean of timings, in milliseconds"""
+    histogram = RollingHistogram(max(1, len(samples)))
+    for sample in samples:
+        histogram.add(sample)
+    summary = {f"p{p}_ms": round(value * 1000, 4) for p, value in histogram.percentiles().items()}
+    summary["mean_ms"] = round(histogram.total / max(1, histogram.count) * 1000, 4)
+    summary["n"] = histogram.count
+    return summary
+
+
+def latency_result(samples: List[float], **extra) -> Dict:
+    summary = summarize(samples)
+    return dict(summary, value=summary["p50_ms"], unit="ms", higher_is_better=False, **extra)
+
+
+def throughput_result(calls: int, elapsed: float, **extra) -> Dict:
+    return dict(value=round(calls / elapsed, 1), unit="calls/s", higher_is_better=True, **extra)
+
+
+def bench_frame(app: LanguageLearningVR, sizes: List[int], frames: int) -> Dict[str, Dict]:
+    """draw_ui time for a full repaint and for a frame after one new message, by history length"""
+    results = {}
+    scenario_id = next(iter(app.scenarios.index))
+    for size in sizes:
+        app.select_scenario(scenario_id)
+        now = time.time()
+        app.conversation_history.restore([
+            HistoryRecord(seq, scenario_id, "You" if seq % 2 else "AI", UTTERANCES[seq % len(UTTERANCES)], now)
+            for seq in range(size)])
+        retained = len(app.conversation_history)
+
+        full = []
+        for _ in range(frames):
+            app.invalidate_ui()
+            started = time.perf_counter()
+            app.draw_ui()
+            full.append(time.perf_counter() - started)
+
+        appended = []
+        for i in range(frames):
+            app.add_history_entry("You", UTTERANCES[i % len(UTTERANCES)])
+            started = time.perf_counter()
+            app.draw_ui()
+            appended.append(time.perf_counter() - started)
+
+        results[f"frame.full[history={size}]"] = latency_result(full, retained=retained)
+        results[f"frame.append[history={size}]"] = latency_result(appended, retained=retained)
+    return results
+
+
+def bench_respond(app: LanguageLearningVR, sizes: List[int], calls: int) -> Dict[str, Dict]:
+    """generate_ai_response throughput (and matcher build time) by scenario keyword count"""
+    results = {}
+    for size in sizes:
+        scenario = synthetic_scenario(size)
+        started = time.perf_counter()
+        matcher = KeywordMatcher.from_scenario(scenario)
+        build = time.perf_counter() - started
+        app.current_scenario = scenario
+        app.matcher = matcher
+
+        # Half the inputs hit a keyword, half fall through to the default response
+        inputs = [f"{UTTERANCES[i % len(UTTERANCES)]} word{(i * 7919) % size}" if i % 2 else
+                  UTTERANCES[i % len(UTTERANCES)] for i in range(calls)]
+        started = time.perf_counter()
+        for user_input in inputs:
+            app.generate_ai_response(user_input)
+        elapsed = time.perf_counter() - started
+
+        results[f"respond[keywords={size}]"] = throughput_result(calls, elapsed)
+        results[f"respond.build[keywords={size}]"] = latency_result([build])
+    return results
+
+
+def bench_evaluate(app: LanguageLearningVR, calls: int) -> Dict[str, Dict]:
+    """evaluate_response throughput over a mix of short and long utterances"""
+    app.select_scenario(next(iter(app.scenarios.index)))
+    inputs = [f"{UTTERANCES[i % len(UTTERANCES)]} {i}" for i in range(calls)]
+    started = time.perf_counter()
+    for user_input in inputs:
+        app.evaluate_response(user_input)
+    elapsed = time.perf_counter() - started
+    return {"evaluate": throughput_result(calls, elapsed)}
+
+
+def bench_turn(app: LanguageLearningVR, turns: int) -> Dict[str, Dict]:
+    """End-to-end conversation_loop latency: capture, recognize, evaluate, respond and speak"""
+    clips = [synthetic_clip(seed) for seed in range(turns)]
+    backend = OfflineBackend()
+    for i, clip in enumerate(clips):
+        backend.add(clip, UTTERANCES[i % len(UTTERANCES)])
+    # Selecting a scenario installs the live backends, so pick it before the stubs go in
+    app.select_scenario(next(iter(app.scenarios.index)))
+    app.speech_recognizer = ConcurrentRecognizer([backend])
+    app.capture = CannedCapture(clips)
+    app.set_component_status("mic", "ready")
+    app.metrics.enabled = True
+
+    latencies = []
+    for _ in range(turns):
+        # Returns once the turn has been scored and its response spoken
+        app.conversation_loop()
+        # Measured by the pipeline itself, from listening until the response was spoken
+        latencies.append(app.metrics.histograms["turn"].last)
+
+    stages = {name: round(stats["p50"] * 1000, 4) for name, stats in app.metrics.snapshot()["timers"].items()
+              if name != "frame"}
+    return {"turn": latency_result(latencies, stages_p50_ms=stages)}
+
+
+def run_benchmarks(selected: List[str], quick: bool = False) -> Dict:
+    """Run the selected benchmarks and return the result document"""
+    scale = 0.2 if quick else 1.0
+    runs: Dict[str, Callable[[LanguageLearningVR], Dict]] = {
+        "frame": lambda app: bench_frame(app, FRAME_HISTORY_SIZES, max(5, int(50 * scale))),
+        "respond": lambda app: bench_respond(app, [5, 50, 500, 5000], max(100, int(20000 * scale))),
+        "evaluate": lambda app: bench_evaluate(app, max(100, int(50000 * scale))),
+        "turn": lambda app: bench_turn(app, max(10, int(200 * scale))),
+    }
+
+    results = {}
+    # The app narrates turns on stdout; keep that free for the JSON results
+    with tempfile.TemporaryDirectory(prefix="vr-bench-") as workdir, contextlib.redirect_stdout(sys.stderr):
+        # The history ring must hold the largest benchmarked history, or it would just be the default size again
+        app = LanguageLearningVR.headless(workdir, history_capacity=max(FRAME_HISTORY_SIZES))
+        try:
+            for name in selected:
+                started = time.perf_counter()
+                results.update(runs[name](app))
+                print(f"  {name}: {time.perf_counter() - started:.1f}s", file=sys.stderr)
+        finally:
+            app.shutdown()
+
+    return {
+        "meta": {
+            "timestamp": time.time(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "pygame": pygame.version.ver,
+            "quick": quick,
+        },
+        "results": results,
+    }
+
+
+def compare(baseline: Dict, current: Dict, threshold: float) -> List[str]:
+    """Print a comparison table (on stderr, stdout may hold the JSON results) and return the names of results that regressed"""
+    regressions = []
+    print(f"{'benchmark':<36} {'baseline':>12} {'current':>12} {'change':>8}", file=sys.stderr)
+    for name, result in current["results"].items():
+        base = baseline["results"].get(name)
+        if not base or not base["value"]:
+            continue
+        change = (result["value"] - base["value"]) / base["value"]
+        worse = -change if result["higher_is_better"] else change
+        if worse > threshold:
+            status = "REGRESSION"
+            regressions.append(name)
+        elif worse < -threshold:
+            status = "improved"
+        else:
+            status = ""
+        print(f"{name:<36} {base['value']:>12.4g} {result['value']:>12.4g} {change:>+8.1%} {result['unit']} {status}",
+              file=sys.stderr)
+    return regressions
+
+
+def load(path: str) -> Dict:
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Headless benchmarks for rendering, responses, scoring and turns")
+    parser.add_argument("-o", "--output", default="-", help="JSON results file, or - for stdout (default)")
+    parser.add_argument("--only", default=",".join(BENCHMARKS), help=f"Comma-separated subset of {', '.join(BENCHMARKS)}")
+    parser.add_argument("--quick", action="store_true", help="Fewer iterations (noisier, for smoke runs)")
+    parser.add_argument("--compare", nargs="+", metavar="FILE",
+                        help="Baseline JSON to compare this run against, or BASELINE CURRENT to compare two files")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="Relative slowdown reported as a regression (default: 0.10)")
+    args = parser.parse_args(argv)
+
+    if args.compare and len(args.compare) > 2:
+        parser.error("--compare takes a baseline file and optionally a current file")
+
+    if args.compare and len(args.compare) == 2:
+        current = load(args.compare[1])
+    else:
+        selected = [name.strip() for name in args.only.split(",") if name.strip()]
+        unknown = set(selected) - set(BENCHMARKS)
+        if unknown:
+            parser.error(f"unknown benchmark(s): {', '.join(sorted(unknown))}")
+        print("Running benchmarks...", file=sys.stderr)
+        current = run_benchmarks(selected, args.quick)
+        document = json.dumps(current, indent=2)
+        if args.output == "-":
+            print(document)
+        else:
+            with open(args.output, "w", encoding="utf-8") as f:
+                f.write(document + "\n")
+
+    if args.compare:
+        regressions = compare(load(args.compare[0]), current, args.threshold)
+        if regressions:
+            print(f"{len(regressions)} regression(s) over {args.threshold:.0%}: {', '.join(regressions)}", file=sys.stderr)
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
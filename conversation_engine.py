@@ -0,0 +1,131 @@
+import time
+import uuid
+from collections import deque
+from typing import Callable, Dict, Optional, Tuple
+
+from evaluation import Evaluation, ResponseEvaluator
+from keyword_matcher import KeywordMatcher
+from scenario_catalog import INITIAL_STATE, ScenarioCatalog
+
+# An utterance counts towards progress above this grammar score
+CORRECT_GRAMMAR_SCORE = 80
+
+# Feedback for an utterance that matches none of the scenario's keywords
+OFF_TOPIC_FEEDBACK = "Try to respond with phrases relevant to the conversation"
+
+
+class ConversationSession:
+    """Per-learner state kept by the engine.
+
+    Holds only the scenario id and dialogue state (scenario bodies and matchers are
+    shared through the catalog), two progress counters and a short bounded history,
+    so a server can keep thousands of these in memory.
+    """
+    __slots__ = ("id", "scenario_id", "state", "correct_responses", "total_interactions", "history", "last_active")
+
+    def __init__(self, session_id: Optional[str] = None, history_size: int = 20):
+        self.id = session_id or uuid.uuid4().hex
+        self.scenario_id = None
+        self.state = None  # Current dialogue state, for scenarios that define states
+        self.correct_responses = 0
+        self.total_interactions = 0
+        self.history = deque(maxlen=history_size)  # (speaker, text) pairs, oldest dropped first
+        self.last_active = time.monotonic()
+
+    def progress(self) -> Dict:
+        return {"correct_responses": self.correct_responses, "total_interactions": self.total_interactions}
+
+
+class ConversationEngine:
+    """Scenario selection, response generation and scoring, independent of any UI"""
+
+    def __init__(self, catalog: ScenarioCatalog, evaluator: Optional[ResponseEvaluator] = None):
+        self.catalog = catalog
+        self.evaluator = evaluator or ResponseEvaluator()
+        self.evaluator.add_analyzer(self.analyze_relevance)
+
+    @staticmethod
+    def generate_response(scenario: Optional[Dict], matcher: Optional[KeywordMatcher], user_input: str,
+                          review: Optional[Callable[[str], int]] = None) -> str:
+        """Scenario response for the best-scoring keyword intent, or its default.
+
+        review(response) adds to a matched intent's score, so among the replies that
+        fit the input, one that brings back vocabulary due for review is favored.
+        """
+        if not scenario:
+            return "Please start a scenario first."
+        responses = scenario["responses"]
+        if review is None:
+            intent = matcher.match(user_input)
+        else:
+            scores = matcher.scores(user_input)
+            intent = min(scores, key=lambda name: (-(scores[name] + review(responses[name])),
+                                                   matcher.priority[name])) if scores else None
+        return responses[intent or "default"]
+
+    @staticmethod
+    def follow_state(state: Dict, matcher: KeywordMatcher, user_input: str, state_name: str) -> Tuple[str, str]:
+        """Reply of a dialogue state for the best-matching intent (or its default), and the state to move to"""
+        reply = state["responses"][matcher.match(user_input) or "default"]
+        return reply["text"], reply.get("next_state", state_name)
+
+    def evaluate(self, user_input: str, scenario: Optional[Dict], audio=None,
+                 matcher: Optional[KeywordMatcher] = None) -> Evaluation:
+        """Score an utterance once in the context of a scenario (and its audio, when there is some)"""
+        return self.evaluator.evaluate(user_input, {"scenario": scenario, "audio": audio, "matcher": matcher})
+
+    @staticmethod
+    def analyze_relevance(user_input: str, evaluation: Evaluation, context: Dict):
+        """Evaluation analyzer: suggest staying on topic when no scenario keyword was used"""
+        matcher = context.get("matcher")
+        # A closing dialogue state has no keywords, so there is nothing to be on topic with
+        if matcher is not None and matcher.priority and not matcher.scores(user_input):
+            evaluation.feedback.append(OFF_TOPIC_FEEDBACK)
+
+    @staticmethod
+    def is_correct(evaluation: Evaluation) -> bool:
+        return evaluation.grammar_score > CORRECT_GRAMMAR_SCORE
+
+    def start(self, session: ConversationSession, scenario_id: str) -> Dict:
+        """Switch a session to a scenario; returns the scenario's opening details"""
+        scenario = self.catalog.get(scenario_id)
+        session.scenario_id = scenario_id
+        session.state = INITIAL_STATE if "states" in scenario else None
+        session.history.clear()
+        session.history.append(("AI", scenario["initial_prompt"]))
+        session.last_active = time.monotonic()
+        return self.describe(scenario_id)
+
+    def describe(self, scenario_id: str) -> Dict:
+        """A scenario's opening details, as shown to the learner"""
+        scenario = self.catalog.get(scenario_id)
+        return {
+            "scenario": scenario_id,
+            "name": scenario["name"],
+            "setting": scenario.get("setting", ""),
+            "ai_character": scenario.get("ai_character", ""),
+            "language": scenario.get("language") or "en-US",
+            "prompt": scenario["initial_prompt"],
+        }
+
+    def respond(self, session: ConversationSession, user_input: str) -> Tuple[str, Evaluation]:
+        """Score the learner's utterance, pick the reply and update the session's dialogue state and progress"""
+        scenario = self.catalog.get(session.scenario_id) if session.scenario_id else None
+        states = scenario.get("states", {}) if scenario else {}
+        if session.state not in states:
+            # The scenario file may have changed since the session started
+            session.state = INITIAL_STATE if states else None
+        matcher = self.catalog.matcher(session.scenario_id, session.state) if scenario else None
+        evaluation = self.evaluate(user_input, scenario, matcher=matcher)
+        if session.state is not None:
+            response, session.state = self.follow_state(states[session.state], matcher, user_input, session.state)
+        else:
+            response = self.generate_response(scenario, matcher, user_input)
+        if scenario:
+            session.history.append(("You", user_input))
+            session.history.append(("AI", response))
+            session.total_interactions += 1
+            if self.is_correct(evaluation):
+                session.correct_responses += 1
+        session.last_active = time.monotonic()
+        return response, evaluation
@@ -0,0 +1,186 @@
+import json
+import os
+import queue
+import threading
+import time
+from typing import Dict, List, Optional
+
+from evaluation import Evaluation
+
+
+class HistoryRecord:
+    """One conversation message; __slots__ keeps long sessions compact in memory"""
+    __slots__ = ("seq", "scenario", "speaker", "text", "timestamp", "evaluation")
+
+    def __init__(self, seq: int, scenario: Optional[str], speaker: str, text: str,
+                 timestamp: float, evaluation: Optional[Evaluation] = None):
+        self.seq = seq
+        self.scenario = scenario
+        self.speaker = speaker
+        self.text = text
+        self.timestamp = timestamp
+        self.evaluation = evaluation
+
+    def to_dict(self) -> Dict:
+        return {
+            "type": "message",
+            "seq": self.seq,
+            "scenario": self.scenario,
+            "speaker": self.speaker,
+            "text": self.text,
+            "timestamp": self.timestamp,
+            "evaluation": self.evaluation.to_dict() if self.evaluation else None,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "HistoryRecord":
+        evaluation = Evaluation(**data["evaluation"]) if data.get("evaluation") else None
+        return cls(data["seq"], data.get("scenario"), data["speaker"], data["text"],
+                   data["timestamp"], evaluation)
+
+
+class SessionLog(threading.Thread):
+    """Append-only JSON-lines session log, written behind the UI by a background thread.
+
+    Records are batched and fsync'd once per batch (at most every flush_interval
+    seconds), so a turn never waits on disk I/O.
+    """
+
+    def __init__(self, path: str, flush_interval: float = 1.0, max_batch: int = 256):
+        super().__init__(daemon=True, name="session-log")
+        self.path = path
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self._queue = queue.Queue()
+
+    def write(self, record: Dict):
+        self._queue.put(record)
+
+    def close(self, timeout: float = 5.0):
+        """Flush everything still queued and stop the writer"""
+        self._queue.put(None)
+        if self.is_alive():
+            self.join(timeout)
+
+    def run(self):
+        try:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                closing = False
+                while not closing:
+                    batch = [self._queue.get()]
+                    deadline = time.monotonic() + self.flush_interval
+                    while len(batch) < self.max_batch and batch[-1] is not None:
+                        remaining = deadline - time.monotonic()
+                        if remaining <= 0:
+                            break
+                        try:
+                            batch.append(self._queue.get(timeout=remaining))
+                        except queue.Empty:
+                            break
+                    closing = batch[-1] is None
+                    lines = [json.dumps(record, ensure_ascii=False) + "\n" for record in batch if record is not None]
+                    if lines:
+                        f.writelines(lines)
+                        f.flush()
+                        os.fsync(f.fileno())
+        except OSError as e:
+            print(f"Session log error: {e}")
+
+    @staticmethod
+    def read_tail(path: str, max_records: int, block_size: int = 65536) -> List[Dict]:
+        """Last max_records records of a log, reading backwards from the end of the file"""
+        try:
+            f = open(path, "rb")
+        except FileNotFoundError:
+            return []
+        with f:
+            f.seek(0, os.SEEK_END)
+            position = f.tell()
+            data = b""
+            while position > 0 and data.count(b"\n") <= max_records:
+                step = min(block_size, position)
+                position -= step
+                f.seek(position)
+                data = f.read(step) + data
+
+        lines = data.split(b"\n")
+        if position > 0:
+            lines = lines[1:]  # First line is probably partial
+        records = []
+        for line in lines[-(max_records + 1):]:
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue  # Torn write from a crash
+            if isinstance(record, dict):
+                records.append(record)
+        return records[-max_records:]
+
+
+class HistoryStore:
+    """Bounded in-memory ring of recent messages for the UI, spilling every message to a SessionLog"""
+
+    def __init__(self, capacity: int = 500, log: Optional[SessionLog] = None):
+        self.capacity = capacity
+        self.log = log
+        self._ring: List[Optional[HistoryRecord]] = [None] * capacity
+        self._start = 0
+        self._size = 0
+        self._next_seq = 0
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def __bool__(self) -> bool:
+        return self._size > 0
+
+    def __getitem__(self, index: int) -> HistoryRecord:
+        with self._lock:
+            if index < 0:
+                index += self._size
+            if not 0 <= index < self._size:
+                raise IndexError("history index out of range")
+            return self._ring[(self._start + index) % self.capacity]
+
+    def __iter__(self):
+        with self._lock:
+            records = [self._ring[(self._start + i) % self.capacity] for i in range(self._size)]
+        return iter(records)
+
+    def append(self, speaker: str, text: str, scenario: Optional[str] = None,
+               evaluation: Optional[Evaluation] = None) -> HistoryRecord:
+        with self._lock:
+            record = HistoryRecord(self._next_seq, scenario, speaker, text, time.time(), evaluation)
+            self._push(record)
+        if self.log:
+            self.log.write(record.to_dict())
+        return record
+
+    def clear(self):
+        """Empty the in-memory view; the session log keeps everything"""
+        with self._lock:
+            self._ring = [None] * self.capacity
+            self._start = 0
+            self._size = 0
+
+    def restore(self, records: List[HistoryRecord]):
+        """Load previously logged records into the ring without logging them again"""
+        with self._lock:
+            for record in records:
+                self._push(record)
+                self._next_seq = max(self._next_seq, record.seq + 1)
+
+    def _push(self, record: HistoryRecord):
+        if self._size < self.capacity:
+            self._ring[(self._start + self._size) % self.capacity] = record
+            self._size += 1
+        else:
+            self._ring[self._start] = record
+            self._start = (self._start + 1) % self.capacity
+        self._next_seq = record.seq + 1
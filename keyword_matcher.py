@@ -0,0 +1,106 @@
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# Words are runs of letters/digits, keeping apostrophes so "that's" stays one token
+TOKEN_PATTERN = re.compile(r"[\w']+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercase text and split it into word tokens"""
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+class KeywordMatcher:
+    """Token-level Aho-Corasick automaton mapping keyword phrases to scenario intents.
+
+    Phrases match on whole words only ("order" does not match inside "border"),
+    and a single pass over the input tokens finds every phrase regardless of how
+    many keywords the scenario defines.
+    """
+
+    def __init__(self, intents: Dict[str, Iterable[str]]):
+        # Intent declaration order is the tie-break priority (earlier wins)
+        self.priority = {}
+        self._goto: List[Dict[str, int]] = [{}]
+        self._fail: List[int] = [0]
+        self._output: List[List[Tuple[str, int]]] = [[]]
+
+        for priority, (intent, phrases) in enumerate(intents.items()):
+            self.priority[intent] = priority
+            for phrase in phrases:
+                tokens = tokenize(phrase)
+                if tokens:
+                    self._add_phrase(tokens, intent)
+        self._build_failure_links()
+
+    @classmethod
+    def from_scenario(cls, scenario: Dict) -> "KeywordMatcher":
+        """Compile a matcher from a scenario's responses and optional keyword synonyms"""
+        synonyms = scenario.get("keywords", {})
+        intents = {}
+        for intent in scenario["responses"]:
+            if intent == "default":
+                continue
+            intents[intent] = [intent] + list(synonyms.get(intent, []))
+        return cls(intents)
+
+    def _add_phrase(self, tokens: List[str], intent: str):
+        node = 0
+        for token in tokens:
+            next_node = self._goto[node].get(token)
+            if next_node is None:
+                next_node = len(self._goto)
+                self._goto[node][token] = next_node
+                self._goto.append({})
+                self._fail.append(0)
+                self._output.append([])
+            node = next_node
+        self._output[node].append((intent, len(tokens)))
+
+    def _build_failure_links(self):
+        queue = deque(self._goto[0].values())
+        while queue:
+            node = queue.popleft()
+            for token, child in self._goto[node].items():
+                queue.append(child)
+                fallback = self._fail[node]
+                while fallback and token not in self._goto[fallback]:
+                    fallback = self._fail[fallback]
+                target = self._goto[fallback].get(token, 0)
+                self._fail[child] = target if target != child else 0
+                self._output[child] = self._output[child] + self._output[self._fail[child]]
+
+    def find_all(self, text: str) -> List[Tuple[str, int, int]]:
+        """Return every (intent, start token index, phrase length) found in text"""
+        return self._find(tokenize(text))
+
+    def _find(self, tokens: List[str]) -> List[Tuple[str, int, int]]:
+        hits = []
+        node = 0
+        for position, token in enumerate(tokens):
+            while node and token not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(token, 0)
+            for intent, length in self._output[node]:
+                hits.append((intent, position - length + 1, length))
+        return hits
+
+    def scores(self, text: str) -> Dict[str, int]:
+        """Score each matched intent by the number of distinct keywords or phrases of it found.
+
+        A phrase counts once however many words it has, so a long generic phrase
+        doesn't outweigh the content word that says what the learner wants.
+        """
+        tokens = tokenize(text)
+        found = {}
+        for intent, start, length in self._find(tokens):
+            found.setdefault(intent, set()).add(tuple(tokens[start:start + length]))
+        return {intent: len(phrases) for intent, phrases in found.items()}
+
+    def match(self, text: str) -> Optional[str]:
+        """Best intent for text: highest score, then earliest declared; None if nothing matched"""
+        scores = self.scores(text)
+        if not scores:
+            return None
+        return min(scores, key=lambda intent: (-scores[intent], self.priority[intent]))
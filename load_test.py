@@ -0,0 +1,247 @@
+"""Load generator for server.py.
+
+Simulates many learners at once: each session connects, picks a scenario, takes a
+number of turns and leaves, over HTTP keep-alive or WebSocket. Reports sessions per
+second, requests per second and request/session latency percentiles.
+
+    python server.py &
+    python load_test.py --sessions 5000 --concurrency 500 --turns 5
+    python load_test.py --spawn --transport ws
+"""
+import argparse
+import asyncio
+import base64
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+from typing import Dict, List, Optional, Tuple
+
+from metrics import Metrics
+from server import OP_CLOSE, OP_TEXT, encode_frame, read_frame
+
+UTTERANCES = [
+    "Hello, good evening",
+    "Can I see the menu please",
+    "I would like to order the pasta",
+    "Could I have a glass of water",
+    "I have five years of experience in software",
+    "My biggest strength is teamwork",
+    "I am looking for a blue jacket",
+    "Do you have this in a medium size",
+    "How much does it cost",
+    "Thank you, that's all",
+]
+
+
+class HTTPClient:
+    """Minimal keep-alive HTTP/1.1 JSON client"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def connect(self):
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+
+    async def request(self, method: str, path: str, payload: Optional[Dict] = None) -> Tuple[int, Dict]:
+        body = json.dumps(payload).encode("utf-8") if payload is not None else b""
+        head = (f"{method} {path} HTTP/1.1\r\nHost: {self.host}:{self.port}\r\n"
+                f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n")
+        self.writer.write(head.encode("latin-1") + body)
+        status = int((await self.reader.readline()).split()[1])
+        length = 0
+        while True:
+            line = await self.reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            if name.strip().lower() == "content-length":
+                length = int(value)
+        data = await self.reader.readexactly(length) if length else b""
+        return status, json.loads(data) if data else {}
+
+    async def close(self):
+        if self.writer:
+            self.writer.close()
+
+
+class WebSocketClient:
+    """Minimal WebSocket client speaking the server's JSON messages"""
+
+    def __init__(self, host: str, port: int):
+        self.host = host
+        self.port = port
+        self.reader = None
+        self.writer = None
+
+    async def connect(self) -> Dict:
+        self.reader, self.writer = await asyncio.open_connection(self.host, self.port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        self.writer.write((f"GET /ws HTTP/1.1\r\nHost: {self.host}:{self.port}\r\nUpgrade: websocket\r\n"
+                           f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\n"
+                           "Sec-WebSocket-Version: 13\r\n\r\n").encode("latin-1"))
+        status = int((await self.reader.readline()).split()[1])
+        while (await self.reader.readline()) not in (b"\r\n", b"\n", b""):
+            pass
+        if status != 101:
+            raise ConnectionError(f"WebSocket upgrade refused ({status})")
+        return await self.receive()
+
+    async def send(self, payload: Dict) -> Dict:
+        self.writer.write(encode_frame(OP_TEXT, json.dumps(payload).encode("utf-8"), mask=True))
+        return await self.receive()
+
+    async def receive(self) -> Dict:
+        _, _, payload = await read_frame(self.reader)
+        return json.loads(payload)
+
+    async def close(self):
+        if self.writer:
+            self.writer.write(encode_frame(OP_CLOSE, b"\x03\xe8", mask=True))
+            self.writer.close()
+
+
+async def timed(metrics: Metrics, coroutine):
+    with metrics.timer("request"):
+        return await coroutine
+
+
+async def http_session(host: str, port: int, scenarios: List[str], turns: int, metrics: Metrics):
+    client = HTTPClient(host, port)
+    await client.connect()
+    try:
+        status, created = await timed(metrics, client.request("POST", "/api/sessions"))
+        if status != 201:
+            raise RuntimeError(f"create session: {status}")
+        base = f"/api/sessions/{created['session']}"
+        status, _ = await timed(metrics, client.request("POST", f"{base}/scenario",
+                                                        {"scenario": random.choice(scenarios)}))
+        if status != 200:
+            raise RuntimeError(f"start scenario: {status}")
+        for _ in range(turns):
+            status, _ = await timed(metrics, client.request("POST", f"{base}/turn",
+                                                            {"text": random.choice(UTTERANCES)}))
+            if status != 200:
+                raise RuntimeError(f"turn: {status}")
+        await timed(metrics, client.request("DELETE", base))
+    finally:
+        await client.close()
+
+
+async def ws_session(host: str, port: int, scenarios: List[str], turns: int, metrics: Metrics):
+    client = WebSocketClient(host, port)
+    try:
+        await timed(metrics, client.connect())
+        reply = await timed(metrics, client.send({"type": "start", "scenario": random.choice(scenarios)}))
+        if reply.get("type") != "scenario":
+            raise RuntimeError(f"start scenario: {reply}")
+        for _ in range(turns):
+            reply = await timed(metrics, client.send({"type": "turn", "text": random.choice(UTTERANCES)}))
+            if reply.get("type") != "turn":
+                raise RuntimeError(f"turn: {reply}")
+    finally:
+        await client.close()
+
+
+async def run_load(host: str, port: int, sessions: int, concurrency: int, turns: int, transport: str) -> Dict:
+    metrics = Metrics(enabled=True, window=max(1024, sessions * (turns + 3)))
+    client = HTTPClient(host, port)
+    await client.connect()
+    _, index = await client.request("GET", "/api/scenarios")
+    await client.close()
+    scenarios = [scenario["id"] for scenario in index["scenarios"]]
+    run_session = ws_session if transport == "ws" else http_session
+
+    remaining = iter(range(sessions))
+    errors = []
+
+    async def worker():
+        for _ in remaining:
+            started = time.perf_counter()
+            try:
+                await run_session(host, port, scenarios, turns, metrics)
+            except (OSError, RuntimeError, ValueError, asyncio.IncompleteReadError) as e:
+                errors.append(str(e))
+                continue
+            metrics.observe("session", time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(min(concurrency, sessions))))
+    elapsed = time.perf_counter() - started
+
+    snapshot = metrics.snapshot()["timers"]
+    completed = snapshot.get("session", {}).get("count", 0)
+    requests = snapshot.get("request", {}).get("count", 0)
+    return {
+        "transport": transport,
+        "sessions": completed,
+        "errors": len(errors),
+        "first_errors": errors[:5],
+        "elapsed": round(elapsed, 3),
+        "sessions_per_second": round(completed / elapsed, 1),
+        "requests_per_second": round(requests / elapsed, 1),
+        "latency_ms": {name: {key: round(value * 1000, 3) for key, value in stats.items()
+                              if key.startswith("p") or key == "mean"}
+                       for name, stats in snapshot.items()},
+    }
+
+
+def spawn_server(port: int) -> subprocess.Popen:
+    """Start server.py on port and wait until it accepts connections"""
+    server_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "server.py")
+    process = subprocess.Popen([sys.executable, server_path, "--port", str(port)], stdout=subprocess.DEVNULL)
+
+    async def wait_ready():
+        for _ in range(100):
+            try:
+                _, writer = await asyncio.open_connection("127.0.0.1", port)
+                writer.close()
+                return
+            except OSError:
+                await asyncio.sleep(0.05)
+        raise RuntimeError("server did not start")
+
+    asyncio.run(wait_ready())
+    return process
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate concurrent learner sessions against server.py")
+    parser.add_argument("--host", default="127.0.0.1", help="Server host (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="Server port (default: 8000)")
+    parser.add_argument("--sessions", type=int, default=2000, help="Sessions to run in total")
+    parser.add_argument("--concurrency", type=int, default=200, help="Sessions in flight at once")
+    parser.add_argument("--turns", type=int, default=5, help="Turns per session")
+    parser.add_argument("--transport", choices=("http", "ws"), default="http", help="HTTP keep-alive or WebSocket")
+    parser.add_argument("--spawn", action="store_true", help="Start a local server.py for the run")
+    parser.add_argument("-o", "--output", help="Write the report as JSON")
+    args = parser.parse_args(argv)
+
+    process = spawn_server(args.port) if args.spawn else None
+    try:
+        report = asyncio.run(run_load(args.host, args.port, args.sessions, args.concurrency,
+                                      args.turns, args.transport))
+    finally:
+        if process:
+            process.terminate()
+            process.wait()
+
+    request = report["latency_ms"].get("request", {})
+    print(f"{report['sessions']} sessions ({report['errors']} errors) over {args.transport} in {report['elapsed']:.1f}s: "
+          f"{report['sessions_per_second']:.0f} sessions/s, {report['requests_per_second']:.0f} requests/s")
+    print(f"Request latency: p50 {request.get('p50', 0):.2f} ms, p95 {request.get('p95', 0):.2f} ms, "
+          f"p99 {request.get('p99', 0):.2f} ms")
+    for error in report["first_errors"]:
+        print(f"  error: {error}")
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
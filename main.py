@@ -1,38 +1,137 @@
 import pygame
-import speech_recognition as sr
-import pyttsx3
-import json
-import random
+import math
+import os
 import threading
-from datetime import datetime
 import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Dict, List, Optional
 
+from conversation_engine import ConversationEngine
+from evaluation import Evaluation
+from history_store import HistoryRecord, HistoryStore, SessionLog
+from metrics import PERCENTILES, Metrics
+from recording import SessionRecorder
+from scenario_catalog import ScenarioCatalog
+from speech_output import SilentEngine, TTSWorker
+from turn_pipeline import TurnPipeline
+from vocabulary import VocabularyTracker
+
+# Directory of scenario JSON files shipped next to this script
+SCENARIO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios")
+# Pre-synthesized audio for known scenario lines
+TTS_CACHE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), ".tts_cache")
+# Append-only log of every message and progress update, used to resume sessions
+SESSION_LOG_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "sessions", "session_log.jsonl")
+
+class HistoryLayout:
+    """Word-wraps conversation entries once and keeps their rendered lines in a bounded LRU cache"""
+    
+    def __init__(self, font, max_width: int, color, line_height: int = 25, entry_spacing: int = 35, max_entries: int = 256):
+        self.font = font
+        self.max_width = max_width
+        self.color = color
+        self.line_height = line_height
+        self.entry_spacing = entry_spacing
+        self.max_entries = max_entries
+        self.space_width = font.size(" ")[0]
+        self._cache = OrderedDict()
+    
+    def wrap(self, text: str) -> List[str]:
+        """Greedy word wrap that measures every word once (linear in message length)"""
+        lines = []
+        current_line = []
+        line_width = 0
+        for word in text.split():
+            word_width = self.font.size(word)[0]
+            new_width = line_width + self.space_width + word_width if current_line else word_width
+            if new_width < self.max_width or not current_line:
+                current_line.append(word)
+                line_width = new_width
+            else:
+                lines.append(' '.join(current_line))
+                current_line = [word]
+                line_width = word_width
+        if current_line:
+            lines.append(' '.join(current_line))
+        return lines
+    
+    def layout(self, entry: HistoryRecord):
+        """Return (line surfaces, height) for a history entry, wrapping it only on a cache miss"""
+        laid_out = self._cache.get(entry.seq)
+        if laid_out is not None:
+            self._cache.move_to_end(entry.seq)
+            return laid_out
+        
+        surfaces = [self.font.render(line, True, self.color) for line in self.wrap(entry.text)]
+        laid_out = (surfaces, self.line_height * len(surfaces) + self.entry_spacing)
+        self._cache[entry.seq] = laid_out
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return laid_out
+    
+    def clear(self):
+        """Drop all cached layouts (e.g. when the history is reset)"""
+        self._cache.clear()
+
+# Posted by worker threads whenever state shown in the UI changes
+UI_UPDATE_EVENT = pygame.USEREVENT + 1
+
 class LanguageLearningVR:
-    def __init__(self):
+    # How long the idle main loop sleeps waiting for events (ms)
+    IDLE_TIMEOUT_MS = 1000
+    # While the AI talks, speech must be this much louder than the onset threshold to
+    # interrupt it, so the AI's own voice leaking into the microphone doesn't
+    BARGE_IN_RATIO = 2.0
+    
+    def __init__(self, metrics_path: Optional[str] = None, metrics_enabled: bool = False,
+                 session_log_path: str = SESSION_LOG_PATH, tts_cache_dir: Optional[str] = TTS_CACHE_DIR,
+                 tts_engine_factory=None, start_services: bool = True, record_path: Optional[str] = None,
+                 review_vocabulary: bool = True, history_capacity: int = 500):
+        # Per-stage latency instrumentation; free when disabled (toggle the overlay with F3)
+        self.metrics = Metrics(enabled=metrics_enabled or bool(metrics_path))
+        self.metrics_path = metrics_path
+        self.show_metrics = False
+        
+        # Cold-start timings (seconds since construction began) for the startup report
+        self._startup_started = time.perf_counter()
+        self.startup_times = {}
+        
+        # Set while a UI update notification is pending in the event queue
+        self._ui_dirty = threading.Event()
+        self._status_message = ""
+        self._is_listening = False
+        self.hands_free = False  # Start a turn whenever speech is detected
+        
         # Initialize pygame for basic graphics
         pygame.init()
         self.screen = pygame.display.set_mode((1200, 800))
         pygame.display.set_caption("VR Language Learning - Interactive Conversation")
+        self.mark_startup("window")
         
-        # Initialize speech components with better error handling
-        self.recognizer = sr.Recognizer()
+        # Speech components are created in the background by start_background_services
+        self.recognizer = None
         self.microphone = None
-        self.tts_engine = pyttsx3.init()
-        
-        # Configure TTS engine
-        self.tts_engine.setProperty('rate', 150)  # Speed of speech
-        self.tts_engine.setProperty('volume', 0.9)  # Volume level
+        self.capture = None
+        self.speech_recognizer = None
+        self.recognition_language = "en-US"
+        self.component_status = {"tts": "starting", "mic": "starting"}
         
-        # Initialize microphone with error handling
-        self.setup_microphone()
+        # The TTS worker owns the engine; all speech goes through its queue
+        # (lines queued before the engine has loaded are spoken once it is ready)
+        self.tts = TTSWorker(cache_dir=tts_cache_dir, rate=150, volume=0.9, engine_factory=tts_engine_factory)
+        self.tts.start()
         
         # Conversation state
         self.current_scenario = None
-        self.conversation_history = []
+        self.matcher = None
+        self.session_log = SessionLog(session_log_path)
+        self.session_log.start()
+        self.conversation_history = HistoryStore(capacity=history_capacity, log=self.session_log)
         self.user_progress = {"correct_responses": 0, "total_interactions": 0}
         self.is_listening = False
-        self.listening_thread = None
+        # Optional binary recording of every turn, for replay.py
+        self.recorder = SessionRecorder(record_path) if record_path else None
         
         # Colors for UI
         self.WHITE = (255, 255, 255)
@@ -48,17 +147,174 @@ class LanguageLearningVR:
         self.small_font = pygame.font.Font(None, 24)
         self.large_font = pygame.font.Font(None, 48)
         
-        # Load scenarios
-        self.scenarios = self.load_scenarios()
+        # Wrapped conversation history, laid out once per entry
+        self.history_layout = HistoryLayout(self.small_font, 620, self.BLACK)
+        self.history_scroll = 0  # Entries scrolled back from the newest message
+        
+        # Retained-mode rendering: cached text surfaces and per-region repaint state
+        self._text_cache = {}
+        self._region_state = {}
+        self._full_redraw = True
+        self.regions = {
+            "title": (pygame.Rect(300, 0, 600, 60), self.draw_title),
+            "readiness": (pygame.Rect(900, 0, 300, 60), self.draw_readiness),
+            "status": (pygame.Rect(0, 60, 1200, 40), self.draw_status),
+            "scenario": (pygame.Rect(50, 120, 500, 80), self.draw_scenario),
+            "mic": (pygame.Rect(575, 125, 50, 50), self.draw_mic),
+            "history": (pygame.Rect(50, 220, 700, 350), self.draw_history),
+            "progress": (pygame.Rect(50, 590, 700, 120), self.draw_progress),
+            "controls": (pygame.Rect(780, 120, 400, 525), self.draw_controls),
+            "metrics": (pygame.Rect(50, 715, 1130, 80), self.draw_metrics),
+        }
+        
+        # Scenario index; full scenarios are loaded on demand
+        self.scenarios = ScenarioCatalog(SCENARIO_DIR)
+        self.scenario_keys = self.scenarios.key_bindings()
         
         # Status messages
-        self.status_message = "Ready to start! Press R, J, or S to choose a scenario."
+        self.status_message = f"Ready to start! Press {self.scenario_key_hint()} to choose a scenario."
         self.last_user_input = ""
         
+        # Turns run capture → recognize → respond → evaluate/speak on an asyncio loop;
+        # only its event handler (on_turn_event) changes conversation state
+        self.pipeline = TurnPipeline(listen=self.capture_utterance, recognize=self.recognize_utterance,
+                                     respond=self.generate_ai_response, evaluate=self.evaluate_response,
+                                     speak=self.ai_speak, interrupt=self.tts.interrupt,
+                                     on_event=self.on_turn_event,
+                                     recognize_partial=self.recognize_partial_utterance).start()
+        
+        # Scenario responses and utterance scoring (shared with server.py);
+        # evaluations are stored with their history entry
+        self.engine = ConversationEngine(self.scenarios)
+        self.evaluator = self.engine.evaluator
+        # Fluency from the utterance audio (analyzed while it is being captured);
+        # acoustics.py needs NumPy, so it is only imported once there is audio
+        self.acoustics = None
+        self._acoustics_lock = threading.Lock()
+        self.evaluator.add_analyzer(self.analyze_acoustics)
+        self.last_evaluation = None
+        
+        # Spaced-repetition review of the words and phrases used and heard in each scenario
+        # (the journal is loaded in the background at startup)
+        self.vocabulary = VocabularyTracker(os.path.join(os.path.dirname(session_log_path), "vocabulary.bin"))
+        self.review_terms = ()  # A few items due for review, shown in the progress panel
+        # Let due vocabulary steer the choice of reply (off for replay/benchmarks, which need
+        # responses to depend on the input alone)
+        self.review_vocabulary = review_vocabulary
+        # Reply the last response would have been without review (recorded so replay can check it)
+        self.unreviewed_response = None
+        
+        # Pick up where the last session left off
+        self.resume_session()
+        self.mark_startup("ui")
+        
+        # Microphone discovery/calibration and TTS loading run concurrently
+        # (headless tools such as benchmark.py skip this and plug in their own components)
+        if start_services:
+            self.start_background_services()
+        
+    @classmethod
+    def headless(cls, workdir: str, **kwargs) -> "LanguageLearningVR":
+        """App without a display, microphone or voice (benchmarks, replay); its session log lives in workdir.
+        
+        Callers plug in their own capture and recognizer; TTS is ready when this returns.
+        Replies depend only on the input (no vocabulary review) unless review_vocabulary=True.
+        """
+        os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+        os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+        kwargs.setdefault("review_vocabulary", False)
+        app = cls(session_log_path=os.path.join(workdir, "session_log.jsonl"), tts_cache_dir=None,
+                  tts_engine_factory=SilentEngine, start_services=False, **kwargs)
+        app.wait_for_tts()
+        app.load_vocabulary()
+        return app
+    
+    @property
+    def status_message(self) -> str:
+        return self._status_message
+    
+    @status_message.setter
+    def status_message(self, message: str):
+        self._status_message = message
+        self.notify_ui()
+    
+    @property
+    def is_listening(self) -> bool:
+        return self._is_listening
+    
+    @is_listening.setter
+    def is_listening(self, listening: bool):
+        self._is_listening = listening
+        self.notify_ui()
+    
+    def notify_ui(self):
+        """Wake the main loop to repaint; safe to call from any thread"""
+        if self._ui_dirty.is_set() or not pygame.display.get_init():
+            return
+        self._ui_dirty.set()
+        try:
+            pygame.event.post(pygame.event.Event(UI_UPDATE_EVENT))
+        except pygame.error:
+            # Event queue full; the idle timeout will pick the change up
+            self._ui_dirty.clear()
+    
+    def mark_startup(self, stage: str):
+        """Record when a startup stage finished"""
+        self.startup_times[stage] = time.perf_counter() - self._startup_started
+    
+    def set_component_status(self, component: str, status: str):
+        """Update a readiness indicator shown in the top-right corner"""
+        self.component_status[component] = status
+        self.notify_ui()
+    
+    def start_background_services(self):
+        """Initialize TTS and the microphone concurrently without blocking the first frame"""
+        executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="startup")
+        futures = [executor.submit(self.setup_microphone), executor.submit(self.wait_for_tts),
+                   executor.submit(self.load_vocabulary)]
+        executor.shutdown(wait=False)
+        threading.Thread(target=self.report_startup, args=(futures,), daemon=True).start()
+    
+    def wait_for_tts(self):
+        """Wait for the TTS worker to load its engine"""
+        self.tts.ready.wait()
+        self.set_component_status("tts", "unavailable" if self.tts.error else "ready")
+        self.mark_startup("tts")
+    
+    def load_vocabulary(self):
+        """Replay the vocabulary journal"""
+        self.vocabulary.load()
+        self.refresh_review_terms()
+        self.mark_startup("vocabulary")
+    
+    def refresh_review_terms(self):
+        """Pick the items to show as due for review in the current scenario"""
+        if self.current_scenario:
+            self.review_terms = tuple(item.term for item in self.vocabulary.due(self.current_scenario["id"], limit=3))
+        else:
+            self.review_terms = ()
+        self.notify_ui()
+    
+    def report_startup(self, futures):
+        """Print and log how long each startup stage took once everything is up"""
+        wait(futures)
+        stages = sorted(self.startup_times.items(), key=lambda item: item[1])
+        print("⏱️ Startup: " + ", ".join(f"{stage} {seconds * 1000:.0f} ms" for stage, seconds in stages))
+        self.session_log.write(dict(self.startup_times, type="startup", timestamp=time.time()))
+    
     def setup_microphone(self):
-        """Setup microphone with proper error handling"""
+        """Setup microphone with proper error handling (runs in the background at startup)"""
         try:
+            # Speech/audio modules (and NumPy) are only imported once the window is up
+            import speech_recognition as sr
+            from audio_capture import MicrophoneCapture
+            from recognition import ConcurrentRecognizer
+            
+            self.recognizer = sr.Recognizer()
+            self.speech_recognizer = ConcurrentRecognizer(self.recognition_backends(self.recognition_language))
+            
             # List available microphones
+            self.set_component_status("mic", "searching")
             mic_list = sr.Microphone.list_microphone_names()
             print(f"Available microphones: {len(mic_list)}")
             for i, name in enumerate(mic_list[:5]):  # Show first 5
@@ -67,60 +323,106 @@ class LanguageLearningVR:
             # Try to use default microphone
             self.microphone = sr.Microphone()
             
-            # Test microphone access
-            with self.microphone as source:
-                print("Calibrating microphone for ambient noise...")
-                self.recognizer.adjust_for_ambient_noise(source, duration=1)
-                print("Microphone setup complete!")
+            # Keep the stream open for the whole session; the capture thread
+            # calibrates its noise floor once and keeps adapting it in the background
+            self.set_component_status("mic", "calibrating")
+            capture = MicrophoneCapture(self.microphone, on_speech_start=self.on_speech_start)
+            capture.start()
+            capture.ready.wait(5)
+            if capture.error:
+                raise capture.error
+            self.capture = capture
+            capture.calibrated.wait(5)
+            self.set_component_status("mic", "ready")
+            print("Microphone setup complete!")
                 
         except Exception as e:
             print(f"Microphone setup error: {e}")
             print("Please check your microphone permissions and connection.")
             self.microphone = None
+            self.capture = None
+            self.set_component_status("mic", "unavailable")
+        self.mark_startup("microphone")
+    
+    def recognition_backends(self, language: str) -> List:
+        """Recognizers to race for a scenario language, with English hints as fallbacks"""
+        from recognition import GoogleBackend
+        languages = [language] + [hint for hint in ("en-US", "en-GB") if hint != language]
+        return [GoogleBackend(self.recognizer, hint) for hint in languages]
+    
+    def on_speech_start(self):
+        """Called from the capture thread when speech onset is detected"""
+        if self.tts.is_speaking:
+            capture = self.capture
+            if capture is None or capture.energy < capture.threshold * self.BARGE_IN_RATIO:
+                return
+            # Barge-in: the learner talking over the AI stops it
+            self.tts.interrupt()
+        if self.hands_free:
+            self.start_conversation_turn()
+        
+    def scenario_key_hint(self) -> str:
+        """Human readable list of scenario keys, e.g. R, J, or S"""
+        keys = [key.upper() for key in self.scenario_keys]
+        if len(keys) <= 1:
+            return "".join(keys) or "a scenario key"
+        return ", ".join(keys[:-1]) + ", or " + keys[-1]
+    
+    def scenario_label(self, scenario_id: str) -> str:
+        """Icon and label for a scenario from the catalog index"""
+        meta = self.scenarios.index[scenario_id]
+        return f"{meta.get('icon') or '📍'} {meta.get('label') or meta['name']}"
+    
+    def select_scenario(self, scenario_id: str):
+        """Make a catalog scenario current and reset the visible history"""
+        self.pipeline.cancel()  # A turn in flight belongs to the previous scenario
+        self.current_scenario = self.scenarios.get(scenario_id)
+        self.matcher = self.scenarios.matcher(scenario_id)
+        self.recognition_language = self.current_scenario.get("language") or "en-US"
+        if self.speech_recognizer:
+            self.speech_recognizer.set_backends(self.recognition_backends(self.recognition_language))
+        self.conversation_history.clear()
+        self.history_layout.clear()
+        self.history_scroll = 0
+        self.refresh_review_terms()
+    
+    def resume_session(self):
+        """Restore progress, the last scenario and its recent history from the session log tail"""
+        records = SessionLog.read_tail(self.session_log.path, self.conversation_history.capacity * 2)
+        progress = None
+        scenario_id = None
+        messages = []
+        for record in reversed(records):
+            kind = record.get("type")
+            try:
+                if kind == "progress" and progress is None:
+                    progress = {
+                        "correct_responses": int(record["correct_responses"]),
+                        "total_interactions": int(record["total_interactions"])
+                    }
+                elif kind == "scenario" and scenario_id is None:
+                    scenario_id = record["scenario"]
+                elif kind == "message" and scenario_id is None:
+                    messages.append(HistoryRecord.from_dict(record))
+            except (KeyError, TypeError, ValueError) as e:
+                print(f"Skipping malformed session log record: {e!r}")  # Like a torn line, it's just lost
+        
+        if progress:
+            self.user_progress = progress
+        if scenario_id is None and messages:
+            scenario_id = messages[0].scenario
+        if scenario_id not in self.scenarios:
+            return
         
-    def load_scenarios(self) -> Dict:
-        """Load predefined conversation scenarios"""
-        return {
-            "restaurant": {
-                "name": "French Restaurant",
-                "setting": "You are dining at a French restaurant in Paris",
-                "ai_character": "Marie - Friendly Waitress",
-                "initial_prompt": "Bonjour! Welcome to Le Petit Café. How may I help you today?",
-                "responses": {
-                    "menu": "We have excellent pasta dishes, fresh salads, and our famous coq au vin. What would you like to try?",
-                    "order": "Excellent choice! Would you like anything to drink with that?",
-                    "drink": "Perfect! I'll bring that right out. Anything else for you?",
-                    "bill": "Of course! Your total comes to 45 euros. Will you pay by card or cash?",
-                    "default": "I see. Is there anything else I can help you with today?"
-                }
-            },
-            "job_interview": {
-                "name": "Job Interview",
-                "setting": "You are in a job interview for a marketing position",
-                "ai_character": "Mr. Johnson - HR Manager",
-                "initial_prompt": "Good morning! Please, have a seat. Tell me about yourself.",
-                "responses": {
-                    "experience": "That's impressive! How do you think that experience would help you in this role?",
-                    "skills": "Those are valuable skills. Can you give me a specific example of when you used them?",
-                    "company": "Great question! We're a growing company focused on innovation. What interests you most about working here?",
-                    "salary": "We offer competitive compensation. What are your salary expectations?",
-                    "default": "Interesting. Tell me more about that."
-                }
-            },
-            "shopping": {
-                "name": "Clothing Store",
-                "setting": "You are shopping for clothes in a boutique",
-                "ai_character": "Sofia - Shop Assistant",
-                "initial_prompt": "Hello! Looking for anything specific today?",
-                "responses": {
-                    "looking": "Great! What size are you looking for? We have some beautiful new arrivals.",
-                    "size": "Perfect! Would you like to try it on? The fitting room is right over there.",
-                    "color": "That color would look lovely on you! We also have it in blue and black.",
-                    "price": "This one is 89 euros, but we have a 20% discount today!",
-                    "default": "Of course! Let me know if you need any help."
-                }
-            }
-        }
+        self.select_scenario(scenario_id)
+        messages = [message for message in reversed(messages) if message.scenario == scenario_id]
+        self.conversation_history.restore(messages)
+        for message in reversed(messages):
+            if message.evaluation:
+                self.last_evaluation = message.evaluation
+                self.last_user_input = message.text
+                break
+        self.status_message = f"Resumed {self.current_scenario['name']} scenario. Press SPACE to respond!"
     
     def start_scenario(self, scenario_name: str):
         """Initialize a learning scenario"""
@@ -128,223 +430,297 @@ class LanguageLearningVR:
             self.status_message = f"Scenario '{scenario_name}' not found!"
             return
         
-        self.current_scenario = self.scenarios[scenario_name]
-        self.conversation_history = []
+        self.select_scenario(scenario_name)
+        self.session_log.write({"type": "scenario", "scenario": scenario_name, "timestamp": time.time()})
         
-        # AI speaks the initial prompt
+        # AI speaks the initial prompt while the scenario's other lines are pre-synthesized
         initial_prompt = self.current_scenario["initial_prompt"]
+        self.tts.interrupt()
         self.ai_speak(initial_prompt)
-        self.conversation_history.append({
-            "speaker": "AI",
-            "text": initial_prompt,
-            "timestamp": datetime.now()
-        })
+        self.tts.warm([initial_prompt] + list(self.current_scenario["responses"].values()))
+        self.add_history_entry("AI", initial_prompt)
+        self.vocabulary.hear(scenario_name, initial_prompt, self.matcher)
         
         self.status_message = f"Started {self.current_scenario['name']} scenario. Press SPACE to respond!"
         
-    def listen_to_user(self) -> Optional[str]:
-        """Capture and transcribe user speech with better error handling"""
-        if not self.microphone:
-            self.status_message = "Microphone not available. Please check your microphone setup."
-            return None
-            
-        try:
+    def add_history_entry(self, speaker: str, text: str, evaluation: Optional[Evaluation] = None):
+        """Append a message (and the learner's evaluation, if any) to the conversation history"""
+        scenario_id = self.current_scenario["id"] if self.current_scenario else None
+        self.conversation_history.append(speaker, text, scenario_id, evaluation)
+        self.notify_ui()
+    
+    def scroll_history(self, delta: int):
+        """Scroll the history panel by delta entries (positive scrolls back in time)"""
+        max_scroll = max(0, len(self.conversation_history) - 1)
+        self.history_scroll = min(max_scroll, max(0, self.history_scroll + delta))
+        
+    def capture_utterance(self, on_partial=None, cancel=None):
+        """Next utterance from the always-open capture buffer (blocking; runs on a pipeline worker)"""
+        if not self.capture:
+            raise RuntimeError("Microphone not available")
+        from acoustics import AcousticStream
+        analyzer = self.acoustic_analyzer()
+        stream = AcousticStream(self.capture.threshold)
+        
+        def on_audio(audio):
+            stream.update(audio)
+            if on_partial:
+                on_partial(audio)
+        
+        audio = self.capture.listen(timeout=15, phrase_time_limit=10, on_partial=on_audio, cancel=cancel)
+        analyzer.finish(stream, audio)
+        return audio
+    
+    def acoustic_analyzer(self):
+        """The AcousticAnalyzer, created on first use"""
+        with self._acoustics_lock:
+            if self.acoustics is None:
+                from acoustics import AcousticAnalyzer
+                self.acoustics = AcousticAnalyzer()
+            return self.acoustics
+    
+    def analyze_acoustics(self, user_input: str, evaluation: Evaluation, context: Dict):
+        """Evaluation analyzer: score fluency from context["audio"] when the utterance has audio"""
+        if context.get("audio") is not None:
+            self.acoustic_analyzer()(user_input, evaluation, context)
+    
+    def recognize_utterance(self, audio):
+        """Transcribe audio; all backends / language hints run at once and the first confident result wins"""
+        return self.speech_recognizer.recognize(audio)
+    
+    def recognize_partial_utterance(self, audio):
+        """Interim transcript while the learner is still talking (primary backend only, uncached)"""
+        return self.speech_recognizer.recognize_partial(audio)
+    
+    def on_turn_event(self, kind: str, turn, data):
+        """Apply pipeline progress to the conversation state (runs on the pipeline loop thread)"""
+        if kind == "listening":
             self.status_message = "🎤 Listening... Please speak clearly!"
             self.is_listening = True
-            
-            with self.microphone as source:
-                print("Listening... Please speak.")
-                # Adjust for ambient noise
-                self.recognizer.adjust_for_ambient_noise(source, duration=0.5)
-                # Listen for audio with longer timeout
-                audio = self.recognizer.listen(source, timeout=15, phrase_time_limit=10)
-            
-            self.status_message = "🔄 Processing speech..."
+            print("Listening... Please speak.")
+        
+        elif kind == "partial":
+            self.status_message = f"🎤 {data}..."
+        
+        elif kind == "heard":
             self.is_listening = False
-            
-            # Try Google Speech Recognition first
-            try:
-                text = self.recognizer.recognize_google(audio, language='en-US')
-                print(f"✅ You said: {text}")
-                self.last_user_input = text
-                self.status_message = f"You said: {text}"
-                return text
-            except sr.UnknownValueError:
-                # Try with different language
-                try:
-                    text = self.recognizer.recognize_google(audio)
-                    print(f"✅ You said: {text}")
-                    self.last_user_input = text
-                    self.status_message = f"You said: {text}"
-                    return text
-                except:
-                    pass
-            
-        except sr.WaitTimeoutError:
+            print(f"✅ You said: {turn.text} ({data.backend}, confidence {data.confidence:.0%})")
+            self.last_user_input = turn.text
+            self.status_message = f"You said: {turn.text}"
+        
+        elif kind == "responded":
+            if self.recorder:
+                started_at = time.time() - (time.perf_counter() - turn.started)
+                self.recorder.record(started_at, self.current_scenario["id"], turn.text, turn.response, turn.audio,
+                                     turn.timings["capture"], turn.timings["recognize"], turn.timings["respond"],
+                                     self.unreviewed_response)
+        
+        elif kind == "evaluated":
+            # The reply is already being spoken; both messages go into the history together
+            self.last_evaluation = data
+            self.add_history_entry("You", turn.text, data)
+            self.add_history_entry("AI", turn.response)
+            self.user_progress["total_interactions"] += 1
+            correct = self.engine.is_correct(data)
+            if correct:
+                self.user_progress["correct_responses"] += 1
+            self.session_log.write(dict(self.user_progress, type="progress", timestamp=time.time()))
+            self.vocabulary.observe(self.current_scenario["id"], turn.text, turn.response, correct, self.matcher)
+            self.refresh_review_terms()
+        
+        elif kind == "done":
+            for stage, seconds in turn.timings.items():
+                self.metrics.observe(stage, seconds)
+            self.metrics.increment("turns")
+            self.export_metrics()
+            self.status_message = "Response complete. Press SPACE to continue conversation."
+        
+        elif kind == "failed":
+            self.is_listening = False
+            self.turn_failed(data)
+        
+        elif kind == "cancelled":
+            self.is_listening = False
+    
+    def turn_failed(self, error: Exception):
+        """Report why a turn could not be completed"""
+        import speech_recognition as sr
+        
+        if isinstance(error, sr.WaitTimeoutError):
+            self.metrics.increment("listen_timeouts")
             print("⏰ Listening timeout - no speech detected")
             self.status_message = "No speech detected. Press SPACE to try again."
-        except sr.UnknownValueError:
+        elif isinstance(error, sr.UnknownValueError):
+            self.metrics.increment("unrecognized")
             print("❌ Could not understand audio - please speak more clearly")
             self.status_message = "Could not understand. Please speak more clearly and try again."
-        except sr.RequestError as e:
-            print(f"❌ Speech recognition service error: {e}")
+        elif isinstance(error, sr.RequestError):
+            self.metrics.increment("recognition_errors")
+            print(f"❌ Speech recognition service error: {error}")
             self.status_message = "Speech recognition service error. Check internet connection."
-        except Exception as e:
-            print(f"❌ Unexpected error: {e}")
-            self.status_message = f"Error: {str(e)}"
-        
-        self.is_listening = False
-        return None
+        elif not self.capture:
+            self.status_message = "Microphone not available. Please check your microphone setup."
+        else:
+            print(f"❌ Unexpected error: {error}")
+            self.status_message = f"Error: {str(error)}"
     
-    def ai_speak(self, text: str):
-        """Convert text to speech for AI responses"""
+    def ai_speak(self, text: str, on_done=None):
+        """Queue text to be spoken by the TTS worker; returns immediately"""
         print(f"🤖 AI: {text}")
-        try:
-            self.tts_engine.say(text)
-            self.tts_engine.runAndWait()
-        except Exception as e:
-            print(f"TTS Error: {e}")
+        self.tts.speak(text, on_done)
     
     def generate_ai_response(self, user_input: str) -> str:
         """Generate contextual AI response"""
-        if not self.current_scenario:
-            return "Please start a scenario first."
-        
-        user_input_lower = user_input.lower()
-        responses = self.current_scenario["responses"]
-        
-        # Check for keywords and return appropriate responses
-        for keyword, response in responses.items():
-            if keyword != "default" and keyword in user_input_lower:
-                return response
-        
-        # Return default response if no keywords match
-        return responses["default"]
-    
-    def evaluate_response(self, user_input: str) -> Dict:
-        """Evaluate user's language learning progress"""
-        evaluation = {
-            "grammar_score": min(95, 70 + len(user_input.split()) * 2),
-            "vocabulary_usage": min(90, 60 + len(set(user_input.lower().split())) * 3),
-            "fluency": min(85, 65 + (20 if len(user_input) > 20 else 10)),
-            "context_appropriateness": random.randint(75, 95),
-            "feedback": []
-        }
-        
-        # Add feedback based on input
-        if len(user_input.split()) >= 5:
-            evaluation["feedback"].append("Good use of complete sentences!")
-        if any(word in user_input.lower() for word in ["please", "thank", "sorry", "excuse"]):
-            evaluation["feedback"].append("Great use of polite language!")
-        if len(user_input) < 10:
-            evaluation["feedback"].append("Try to use more detailed responses")
-            
-        return evaluation
+        # Among fitting replies, favor one containing vocabulary that is due for review
+        response = self.unreviewed_response = self.engine.generate_response(
+            self.current_scenario, self.matcher, user_input)
+        if self.review_vocabulary and self.current_scenario:
+            # Among fitting replies, favor one containing vocabulary that is due for review
+            review = self.vocabulary.reviewer(self.current_scenario["id"], self.matcher)
+            response = self.engine.generate_response(self.current_scenario, self.matcher, user_input, review)
+        return response
     
-    def draw_ui(self):
-        """Draw the improved user interface"""
-        self.screen.fill(self.WHITE)
-        
-        # Title with better styling
-        title_text = self.large_font.render("🎧 VR Language Learning", True, self.PURPLE)
-        title_rect = title_text.get_rect(center=(600, 40))
-        self.screen.blit(title_text, title_rect)
-        
-        # Status message with color coding
+    def evaluate_response(self, user_input: str, audio=None) -> Evaluation:
+        """Evaluate user's language learning progress (once per utterance)"""
+        return self.engine.evaluate(user_input, self.current_scenario, audio, self.matcher)
+    
+    def render_text(self, font, text: str, color):
+        """Render text once and reuse the surface for identical (font, text, color)"""
+        key = (font, text, color)
+        surface = self._text_cache.get(key)
+        if surface is None:
+            surface = font.render(text, True, color)
+            self._text_cache[key] = surface
+        return surface
+    
+    def status_color(self):
+        """Pick the status message color from the current state"""
         status_color = self.GREEN if "You said:" in self.status_message else self.BLUE
         if "error" in self.status_message.lower() or "could not" in self.status_message.lower():
             status_color = self.RED
         elif self.is_listening:
             status_color = self.YELLOW
-            
-        status_text = self.font.render(self.status_message, True, status_color)
+        return status_color
+    
+    def draw_title(self, rect: pygame.Rect):
+        """Draw the application title"""
+        title_text = self.render_text(self.large_font, "🎧 VR Language Learning", self.PURPLE)
+        title_rect = title_text.get_rect(center=(600, 40))
+        self.screen.blit(title_text, title_rect)
+    
+    def draw_readiness(self, rect: pygame.Rect):
+        """Draw TTS and microphone readiness while they start up in the background"""
+        colors = {"ready": self.GREEN, "unavailable": self.RED}
+        y_pos = 10
+        for component, label in (("tts", "🔊 Voice"), ("mic", "🎤 Mic")):
+            status = self.component_status[component]
+            text = self.render_text(self.small_font, f"{label}: {status}", colors.get(status, self.PURPLE))
+            self.screen.blit(text, text.get_rect(topright=(rect.right - 10, y_pos)))
+            y_pos += 22
+    
+    def draw_status(self, rect: pygame.Rect):
+        """Draw the status message with color coding"""
+        status_text = self.font.render(self.status_message, True, self.status_color())
         status_rect = status_text.get_rect(center=(600, 80))
         self.screen.blit(status_text, status_rect)
+    
+    def draw_scenario(self, rect: pygame.Rect):
+        """Draw the current scenario card"""
+        if not self.current_scenario:
+            return
+        pygame.draw.rect(self.screen, (240, 248, 255), rect, 0)
+        pygame.draw.rect(self.screen, self.BLUE, rect, 2)
         
-        # Current scenario info
-        if self.current_scenario:
-            pygame.draw.rect(self.screen, (240, 248, 255), (50, 120, 500, 80), 0)
-            pygame.draw.rect(self.screen, self.BLUE, (50, 120, 500, 80), 2)
-            
-            scenario_text = self.small_font.render(f"📍 {self.current_scenario['setting']}", True, self.BLACK)
-            character_text = self.small_font.render(f"👤 {self.current_scenario['ai_character']}", True, self.BLACK)
-            self.screen.blit(scenario_text, (60, 130))
-            self.screen.blit(character_text, (60, 160))
-        
-        # Conversation history with better formatting
-        conversation_rect = pygame.Rect(50, 220, 700, 350)
-        pygame.draw.rect(self.screen, (248, 248, 248), conversation_rect, 0)
-        pygame.draw.rect(self.screen, self.BLACK, conversation_rect, 2)
-        
-        y_offset = 230
-        for entry in self.conversation_history[-10:]:  # Show last 10 messages
-            if y_offset > 550:  # Don't overflow
+        scenario_text = self.render_text(self.small_font, f"📍 {self.current_scenario.get('setting', '')}", self.BLACK)
+        character_text = self.render_text(self.small_font, f"👤 {self.current_scenario.get('ai_character', '')}", self.BLACK)
+        self.screen.blit(scenario_text, (60, 130))
+        self.screen.blit(character_text, (60, 160))
+    
+    def draw_history(self, rect: pygame.Rect):
+        """Draw the conversation history panel, scrolled by history_scroll entries"""
+        pygame.draw.rect(self.screen, (248, 248, 248), rect, 0)
+        pygame.draw.rect(self.screen, self.BLACK, rect, 2)
+        
+        # Walk back from the newest visible entry until the panel is full
+        history = self.conversation_history
+        newest = len(history) - 1 - self.history_scroll
+        available = rect.height - 20
+        visible = []
+        used = 0
+        index = newest
+        while index >= 0:
+            entry = history[index]
+            line_surfaces, height = self.history_layout.layout(entry)
+            if visible and used + height > available:
                 break
-                
-            speaker_color = self.GREEN if entry["speaker"] == "You" else self.BLUE
-            icon = "🗣️" if entry["speaker"] == "You" else "🤖"
+            visible.append((entry.speaker, line_surfaces))
+            used += height
+            index -= 1
+        
+        y_offset = rect.y + 10
+        for speaker, line_surfaces in reversed(visible):
+            speaker_color = self.GREEN if speaker == "You" else self.BLUE
+            icon = "🗣️" if speaker == "You" else "🤖"
             
-            speaker_text = self.small_font.render(f"{icon} {entry['speaker']}:", True, speaker_color)
+            speaker_text = self.render_text(self.small_font, f"{icon} {speaker}:", speaker_color)
             self.screen.blit(speaker_text, (60, y_offset))
             
-            # Word wrap for long messages
-            words = entry['text'].split()
-            lines = []
-            current_line = []
-            for word in words:
-                test_line = ' '.join(current_line + [word])
-                if self.small_font.size(test_line)[0] < 620:
-                    current_line.append(word)
-                else:
-                    if current_line:
-                        lines.append(' '.join(current_line))
-                        current_line = [word]
-                    else:
-                        lines.append(word)
-            if current_line:
-                lines.append(' '.join(current_line))
-            
-            for line in lines[:2]:  # Max 2 lines per message
-                y_offset += 25
-                message_text = self.small_font.render(line, True, self.BLACK)
+            for message_text in line_surfaces:
+                y_offset += self.history_layout.line_height
                 self.screen.blit(message_text, (80, y_offset))
             
-            y_offset += 35
-        
-        # Progress and evaluation
-        progress_rect = pygame.Rect(50, 590, 700, 120)
-        pygame.draw.rect(self.screen, (240, 255, 240), progress_rect, 0)
-        pygame.draw.rect(self.screen, self.GREEN, progress_rect, 2)
+            y_offset += self.history_layout.entry_spacing
+        
+        # Scroll hints
+        if index >= 0:
+            hint = self.render_text(self.small_font, "▲ Earlier (↑)", self.PURPLE)
+            self.screen.blit(hint, hint.get_rect(topright=(rect.right - 10, rect.y + 8)))
+        if self.history_scroll:
+            hint = self.render_text(self.small_font, "▼ Newer (↓)", self.PURPLE)
+            self.screen.blit(hint, hint.get_rect(bottomright=(rect.right - 10, rect.bottom - 8)))
+    
+    def draw_progress(self, rect: pygame.Rect):
+        """Draw progress counters and the latest evaluation"""
+        pygame.draw.rect(self.screen, (240, 255, 240), rect, 0)
+        pygame.draw.rect(self.screen, self.GREEN, rect, 2)
         
         progress_text = self.font.render(f"📊 Progress: {self.user_progress['correct_responses']}/{self.user_progress['total_interactions']} interactions", True, self.BLACK)
         self.screen.blit(progress_text, (60, 600))
         
-        if self.last_user_input:
-            evaluation = self.evaluate_response(self.last_user_input)
-            scores_text = self.small_font.render(f"Grammar: {evaluation['grammar_score']}%  Vocabulary: {evaluation['vocabulary_usage']}%  Fluency: {evaluation['fluency']}%", True, self.BLACK)
+        if self.review_terms:
+            # Changes as items fall due, so it isn't kept in the render cache
+            review_text = self.small_font.render("📚 Review: " + ", ".join(self.review_terms), True, self.PURPLE)
+            self.screen.blit(review_text, review_text.get_rect(topright=(rect.right - 10, 605)))
+        
+        evaluation = self.last_evaluation
+        if evaluation:
+            scores_text = self.small_font.render(f"Grammar: {evaluation.grammar_score}%  Vocabulary: {evaluation.vocabulary_usage}%  Fluency: {evaluation.fluency}%", True, self.BLACK)
             self.screen.blit(scores_text, (60, 640))
             
-            if evaluation['feedback']:
-                feedback_text = self.small_font.render(f"💡 {evaluation['feedback'][0]}", True, self.GREEN)
+            if evaluation.feedback:
+                feedback_text = self.render_text(self.small_font, f"💡 {evaluation.feedback[0]}", self.GREEN)
                 self.screen.blit(feedback_text, (60, 670))
+    
+    def draw_controls(self, rect: pygame.Rect):
+        """Draw the static controls and instructions panel"""
+        pygame.draw.rect(self.screen, (255, 248, 240), rect, 0)
+        pygame.draw.rect(self.screen, self.RED, rect, 2)
         
-        # Control instructions with better layout
-        controls_rect = pygame.Rect(780, 120, 400, 450)
-        pygame.draw.rect(self.screen, (255, 248, 240), controls_rect, 0)
-        pygame.draw.rect(self.screen, self.RED, controls_rect, 2)
-        
-        controls_title = self.font.render("🎮 Controls", True, self.RED)
+        controls_title = self.render_text(self.font, "🎮 Controls", self.RED)
         self.screen.blit(controls_title, (790, 130))
         
-        instructions = [
-            "🎤 SPACE - Start Speaking",
-            "🍽️ R - Restaurant Scenario",
-            "💼 J - Job Interview",
-            "🛍️ S - Shopping Scenario",
-            "❌ Q - Quit",
+        key_lines = ["🎤 SPACE - Start Speaking"]
+        for key, scenario_id in self.scenario_keys.items():
+            icon, _, label = self.scenario_label(scenario_id).partition(" ")
+            key_lines.append(f"{icon} {key.upper()} - {label}")
+        key_lines.append("🎙️ H - Hands-free Mode")
+        key_lines.append("📈 F3 - Performance Overlay")
+        key_lines.append("❌ Q - Quit")
+        
+        instructions = key_lines + [
             "",
             "📋 Instructions:",
-            "1. Choose a scenario (R/J/S)",
+            f"1. Choose a scenario ({'/'.join(key.upper() for key in self.scenario_keys)})",
             "2. Listen to AI character",
             "3. Press SPACE to respond",
             "4. Speak clearly into mic",
@@ -359,122 +735,255 @@ class LanguageLearningVR:
         
         y_pos = 170
         for instruction in instructions:
-            color = self.RED if instruction.startswith(("🎤", "🍽️", "💼", "🛍️", "❌")) else self.BLACK
+            color = self.RED if instruction in key_lines else self.BLACK
             if instruction == "":
                 y_pos += 10
                 continue
-            inst_text = self.small_font.render(instruction, True, color)
+            inst_text = self.render_text(self.small_font, instruction, color)
             self.screen.blit(inst_text, (790, y_pos))
             y_pos += 25
-        
-        # Listening indicator
+    
+    def mic_radius(self) -> int:
+        """Pulsing radius of the listening indicator"""
+        return 20 + round(3 * math.sin(pygame.time.get_ticks() / 150))
+    
+    def draw_mic(self, rect: pygame.Rect):
+        """Draw the listening indicator"""
         if self.is_listening:
-            pygame.draw.circle(self.screen, self.RED, (600, 150), 20)
-            mic_text = self.font.render("🎤", True, self.WHITE)
-            mic_rect = mic_text.get_rect(center=(600, 150))
+            pygame.draw.circle(self.screen, self.RED, rect.center, self.mic_radius())
+            mic_text = self.render_text(self.font, "🎤", self.WHITE)
+            mic_rect = mic_text.get_rect(center=rect.center)
             self.screen.blit(mic_text, mic_rect)
-        
-        pygame.display.flip()
+    
+    def draw_metrics(self, rect: pygame.Rect):
+        """Draw the performance overlay: p50/p95/p99 per stage and event counters"""
+        if not self.show_metrics:
+            return
+        pygame.draw.rect(self.screen, (245, 240, 255), rect, 0)
+        pygame.draw.rect(self.screen, self.PURPLE, rect, 1)
+        
+        snapshot = self.metrics.snapshot()
+        counters = "  ".join(f"{name} {value}" for name, value in sorted(snapshot["counters"].items()))
+        header = self.small_font.render(f"📈 Performance, ms (p50/p95/p99)   {counters}", True, self.PURPLE)
+        self.screen.blit(header, (rect.x + 10, rect.y + 4))
+        
+        column_width = (rect.width - 20) // 3
+        for i, (name, stats) in enumerate(sorted(snapshot["timers"].items())[:9]):
+            values = "/".join(f"{stats[f'p{p}'] * 1000:.1f}" for p in PERCENTILES)
+            text = self.small_font.render(f"{name}: {values}  (n={stats['count']})", True, self.BLACK)
+            self.screen.blit(text, (rect.x + 10 + (i % 3) * column_width, rect.y + 24 + (i // 3) * 18))
+    
+    def toggle_metrics_overlay(self):
+        """Show/hide the performance overlay, turning instrumentation on the first time"""
+        self.show_metrics = not self.show_metrics
+        if self.show_metrics:
+            self.metrics.enabled = True
+    
+    def export_metrics(self):
+        """Write the current metrics snapshot if an export file was configured"""
+        if not self.metrics_path:
+            return
+        try:
+            self.metrics.export(self.metrics_path)
+        except OSError as e:
+            print(f"Metrics export error: {e}")
+    
+    def region_state(self, name: str):
+        """Snapshot of the state a region depends on; a change means it must be repainted"""
+        if name == "metrics":
+            # Refreshed at most once a second while visible
+            return (self.show_metrics, int(time.monotonic()) if self.show_metrics else None)
+        if name == "readiness":
+            return tuple(self.component_status.items())
+        if name == "status":
+            return (self.status_message, self.is_listening)
+        if name == "scenario":
+            return id(self.current_scenario)
+        if name == "mic":
+            return (self.is_listening, self.mic_radius() if self.is_listening else None)
+        if name == "history":
+            history = self.conversation_history
+            return (len(history), history[-1].seq if history else None, self.history_scroll)
+        if name == "progress":
+            return (self.user_progress["correct_responses"], self.user_progress["total_interactions"],
+                    id(self.last_evaluation), self.review_terms)
+        return None  # Static regions (title, controls) never change
+    
+    def invalidate_ui(self):
+        """Force a full repaint on the next frame (e.g. after the window was exposed)"""
+        self._full_redraw = True
+    
+    def draw_ui(self):
+        """Repaint only the regions whose state changed since the last frame"""
+        with self.metrics.timer("frame"):
+            if self._full_redraw:
+                self.screen.fill(self.WHITE)
+                self._region_state.clear()
+            
+            dirty_rects = []
+            for name, (rect, painter) in self.regions.items():
+                state = self.region_state(name)
+                if name in self._region_state and self._region_state[name] == state:
+                    continue
+                self._region_state[name] = state
+                
+                self.screen.set_clip(rect)
+                self.screen.fill(self.WHITE, rect)
+                painter(rect)
+                self.screen.set_clip(None)
+                dirty_rects.append(rect)
+            
+            if self._full_redraw:
+                pygame.display.flip()
+                self._full_redraw = False
+            elif dirty_rects:
+                pygame.display.update(dirty_rects)
     
     def conversation_loop(self):
-        """Main conversation interaction loop - runs in separate thread"""
+        """Run one turn through the pipeline and wait until it has been scored and spoken"""
         if not self.current_scenario:
-            self.status_message = "Please start a scenario first! (Press R, J, or S)"
+            self.status_message = f"Please start a scenario first! (Press {self.scenario_key_hint()})"
             return
         
-        user_input = self.listen_to_user()
-        if user_input:
-            # Add user input to history
-            self.conversation_history.append({
-                "speaker": "You",
-                "text": user_input,
-                "timestamp": datetime.now()
-            })
-            
-            # Generate and speak AI response
-            ai_response = self.generate_ai_response(user_input)
-            
-            # Add AI response to history
-            self.conversation_history.append({
-                "speaker": "AI",
-                "text": ai_response,
-                "timestamp": datetime.now()
-            })
-            
-            # Speak AI response in separate thread so UI doesn't freeze
-            def speak_response():
-                self.ai_speak(ai_response)
-                self.status_message = "Response complete. Press SPACE to continue conversation."
-            
-            threading.Thread(target=speak_response, daemon=True).start()
-            
-            # Update progress
-            self.user_progress["total_interactions"] += 1
-            evaluation = self.evaluate_response(user_input)
-            if evaluation["grammar_score"] > 80:
-                self.user_progress["correct_responses"] += 1
+        done = self.pipeline.trigger()
+        if done is not None:
+            done.result()
+    
+    def start_conversation_turn(self):
+        """Hand a new turn to the pipeline unless one is already being captured"""
+        if not self.current_scenario or self.component_status["mic"] != "ready":
+            return False
+        return self.pipeline.trigger() is not None
+    
+    def toggle_hands_free(self):
+        """Switch between push-to-talk (SPACE) and starting turns on detected speech"""
+        if not self.capture:
+            self.status_message = "Microphone not available. Please check your microphone setup."
+            return
+        self.hands_free = not self.hands_free
+        if self.hands_free:
+            self.status_message = "Hands-free mode on: just start speaking."
+        else:
+            self.status_message = "Hands-free mode off: press SPACE to speak."
     
     def run(self):
-        """Main application loop with improved event handling"""
+        """Main application loop: sleeps until an event arrives, animating only while listening"""
         clock = pygame.time.Clock()
         running = True
         
         print("🎧 VR Language Learning System Started!")
         print("🎯 Choose a scenario to begin learning:")
-        print("   R - Restaurant Scenario")
-        print("   J - Job Interview Scenario") 
-        print("   S - Shopping Scenario")
+        for key, scenario_id in self.scenario_keys.items():
+            print(f"   {key.upper()} - {self.scenarios.index[scenario_id]['name']}")
         print("   SPACE - Start speaking (after choosing scenario)")
+        print("   H - Toggle hands-free mode")
+        print("   F3 - Toggle performance overlay")
         print("   Q - Quit")
         
+        self.draw_ui()
+        self.mark_startup("first_frame")
+        
         while running:
-            for event in pygame.event.get():
+            if self.is_listening:
+                # Animate the listening indicator at full frame rate
+                clock.tick(60)
+                events = pygame.event.get()
+            else:
+                # Block until input or a worker notification arrives
+                events = [pygame.event.wait(self.IDLE_TIMEOUT_MS)] + pygame.event.get()
+            
+            for event in events:
                 if event.type == pygame.QUIT:
                     running = False
                 
+                elif event.type == UI_UPDATE_EVENT:
+                    self._ui_dirty.clear()
+                
+                elif event.type == pygame.VIDEOEXPOSE:
+                    self.invalidate_ui()
+                
+                elif event.type == pygame.MOUSEWHEEL:
+                    self.scroll_history(event.y)
+                
                 elif event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_q:
                         print("👋 Goodbye! Thanks for learning with us!")
                         running = False
                         
-                    elif event.key == pygame.K_r:
-                        print("🍽️ Starting Restaurant scenario...")
-                        self.start_scenario("restaurant")
+                    elif pygame.key.name(event.key) in self.scenario_keys:
+                        scenario_id = self.scenario_keys[pygame.key.name(event.key)]
+                        meta = self.scenarios.index[scenario_id]
+                        print(f"{meta.get('icon') or '📍'} Starting {meta['name']} scenario...")
+                        self.start_scenario(scenario_id)
+                        
+                    elif event.key == pygame.K_h:
+                        self.toggle_hands_free()
                         
-                    elif event.key == pygame.K_j:
-                        print("💼 Starting Job Interview scenario...")
-                        self.start_scenario("job_interview")
+                    elif event.key == pygame.K_F3:
+                        self.toggle_metrics_overlay()
                         
-                    elif event.key == pygame.K_s:
-                        print("🛍️ Starting Shopping scenario...")
-                        self.start_scenario("shopping")
+                    elif event.key == pygame.K_UP:
+                        self.scroll_history(1)
+                        
+                    elif event.key == pygame.K_DOWN:
+                        self.scroll_history(-1)
+                        
+                    elif event.key == pygame.K_PAGEUP:
+                        self.scroll_history(5)
+                        
+                    elif event.key == pygame.K_PAGEDOWN:
+                        self.scroll_history(-5)
                         
                     elif event.key == pygame.K_SPACE:
-                        if self.current_scenario and not self.is_listening:
-                            # Start conversation in separate thread so UI doesn't freeze
-                            if self.listening_thread is None or not self.listening_thread.is_alive():
-                                self.listening_thread = threading.Thread(target=self.conversation_loop, daemon=True)
-                                self.listening_thread.start()
+                        if self.current_scenario and not self.is_listening and self.component_status["mic"] != "ready":
+                            if self.component_status["mic"] == "unavailable":
+                                self.status_message = "Microphone not available. Please check your microphone setup."
+                            else:
+                                self.status_message = "Microphone is still starting up... please wait a moment."
+                        elif self.current_scenario and not self.is_listening:
+                            # Barge in on the AI if it is still talking
+                            self.tts.interrupt()
+                            # The pipeline runs the turn off the UI thread
+                            self.start_conversation_turn()
                         elif not self.current_scenario:
-                            self.status_message = "Please choose a scenario first! (Press R, J, or S)"
+                            self.status_message = f"Please choose a scenario first! (Press {self.scenario_key_hint()})"
                         elif self.is_listening:
                             self.status_message = "Already listening... Please speak!"
             
             self.draw_ui()
-            clock.tick(60)
         
+        self.shutdown()
+    
+    def shutdown(self):
+        """Stop background workers, flush the session log and metrics, and close the window"""
+        if self.capture:
+            self.capture.stop()
+        self.export_metrics()
+        self.pipeline.stop()
+        if self.speech_recognizer:
+            self.speech_recognizer.shutdown()
+        self.tts.stop()
+        self.session_log.close()
+        self.vocabulary.close()
+        if self.recorder:
+            self.recorder.close()
         pygame.quit()
 
 # Usage example with better error handling
 if __name__ == "__main__":
     print("🚀 Starting VR Language Learning System...")
-    print("📋 Required packages: pygame, speechrecognition, pyttsx3, pyaudio")
+    print("📋 Required packages: pygame, speechrecognition, pyttsx3, pyaudio, numpy")
     print("🎤 Make sure your microphone is connected and permissions are granted!")
     
     try:
-        app = LanguageLearningVR()
+        # VR_METRICS=1 turns instrumentation on from the start; VR_METRICS_FILE exports it
+        # (*.prom for Prometheus text, anything else for JSON lines)
+        # VR_RECORD records every turn to a file that replay.py can play back
+        app = LanguageLearningVR(metrics_path=os.environ.get("VR_METRICS_FILE"),
+                                 metrics_enabled=os.environ.get("VR_METRICS") == "1",
+                                 record_path=os.environ.get("VR_RECORD"))
         app.run()
     except Exception as e:
         print(f"❌ Error starting application: {e}")
-        print("💡 Try installing missing packages: pip install pygame speechrecognition pyttsx3 pyaudio")
+        print("💡 Try installing missing packages: pip install pygame speechrecognition pyttsx3 pyaudio numpy")
         input("Press Enter to exit...")
\ No newline at end of file
@@ -0,0 +1,142 @@
+import json
+import os
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+# Percentiles reported for every timer
+PERCENTILES = (50, 95, 99)
+
+
+class RollingHistogram:
+    """Keeps the most recent samples in a fixed-size ring; percentiles are computed on demand"""
+    __slots__ = ("size", "_samples", "count", "total")
+
+    def __init__(self, size: int = 512):
+        self.size = size
+        self._samples = [0.0] * size
+        self.count = 0    # Samples ever observed
+        self.total = 0.0  # Sum of samples ever observed
+
+    def add(self, value: float):
+        self._samples[self.count % self.size] = value
+        self.count += 1
+        self.total += value
+
+    def percentiles(self, percentiles: Iterable[int] = PERCENTILES) -> Dict[int, float]:
+        window = sorted(self._samples[:min(self.count, self.size)])
+        if not window:
+            return {p: 0.0 for p in percentiles}
+        # Nearest-rank percentile over the rolling window
+        return {p: window[min(len(window) - 1, max(0, round(p / 100 * len(window)) - 1))] for p in percentiles}
+
+    @property
+    def last(self) -> float:
+        return self._samples[(self.count - 1) % self.size] if self.count else 0.0
+
+
+class _Timer:
+    __slots__ = ("metrics", "name", "started")
+
+    def __init__(self, metrics: "Metrics", name: str):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.name, time.perf_counter() - self.started)
+        return False
+
+
+class _NullTimer:
+    """Shared no-op timer handed out while metrics are disabled"""
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+_NULL_TIMER = _NullTimer()
+
+
+class Metrics:
+    """Stage timers, counters and rolling p50/p95/p99 histograms.
+
+    While disabled, timer() returns a shared no-op context manager and observe()/
+    increment() return immediately, so instrumented code pays next to nothing.
+    """
+
+    def __init__(self, enabled: bool = False, window: int = 512):
+        self.enabled = enabled
+        self.window = window
+        self.histograms: Dict[str, RollingHistogram] = {}
+        self.counters: Dict[str, int] = {}
+        self._lock = threading.Lock()
+
+    def timer(self, name: str):
+        """Context manager timing a block into the named histogram (seconds)"""
+        return _Timer(self, name) if self.enabled else _NULL_TIMER
+
+    def observe(self, name: str, seconds: float):
+        if not self.enabled:
+            return
+        with self._lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = RollingHistogram(self.window)
+            histogram.add(seconds)
+
+    def increment(self, name: str, amount: int = 1):
+        if not self.enabled:
+            return
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def snapshot(self) -> Dict:
+        """Current percentiles (in seconds) per timer plus all counters"""
+        with self._lock:
+            timers = {}
+            for name, histogram in self.histograms.items():
+                stats = {f"p{p}": value for p, value in histogram.percentiles().items()}
+                stats.update(count=histogram.count, last=histogram.last,
+                             mean=histogram.total / histogram.count if histogram.count else 0.0)
+                timers[name] = stats
+            return {"timers": timers, "counters": dict(self.counters)}
+
+    def export(self, path: str, labels: Optional[Dict[str, str]] = None):
+        """Write a snapshot: Prometheus text for *.prom files, otherwise an appended JSON line"""
+        snapshot = self.snapshot()
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if path.endswith(".prom"):
+            tmp_path = path + ".tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(self.to_prometheus(snapshot, labels))
+            os.replace(tmp_path, path)
+        else:
+            with open(path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(dict(snapshot, labels=labels or {}, timestamp=time.time())) + "\n")
+
+    @staticmethod
+    def to_prometheus(snapshot: Dict, labels: Optional[Dict[str, str]] = None) -> str:
+        """Render a snapshot in the Prometheus text exposition format"""
+        base = ",".join(f'{key}="{value}"' for key, value in (labels or {}).items())
+        lines = ["# TYPE vr_stage_seconds summary"]
+        for name, stats in snapshot["timers"].items():
+            stage = f'stage="{name}"' + (f",{base}" if base else "")
+            for p in PERCENTILES:
+                lines.append(f'vr_stage_seconds{{{stage},quantile="{p / 100}"}} {stats[f"p{p}"]:.6f}')
+            lines.append(f"vr_stage_seconds_count{{{stage}}} {stats['count']}")
+            lines.append(f"vr_stage_seconds_sum{{{stage}}} {stats['mean'] * stats['count']:.6f}")
+        lines.append("# TYPE vr_events_total counter")
+        for name, value in snapshot["counters"].items():
+            event = f'event="{name}"' + (f",{base}" if base else "")
+            lines.append(f"vr_events_total{{{event}}} {value}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,177 @@
+import hashlib
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+import speech_recognition as sr
+
+
+@dataclass
+class RecognitionResult:
+    """A transcript with the confidence reported by the backend that produced it"""
+    text: str
+    confidence: float
+    backend: str
+
+
+def audio_hash(audio: sr.AudioData) -> str:
+    """Content hash of a clip, used to cache and look up recognition results"""
+    digest = hashlib.sha1(audio.frame_data)
+    digest.update(f"{audio.sample_rate}:{audio.sample_width}".encode())
+    return digest.hexdigest()
+
+
+class RecognizerBackend(ABC):
+    """Turns AudioData into a RecognitionResult.
+
+    Implementations raise sr.UnknownValueError when the speech is unintelligible and
+    sr.RequestError when the service itself fails.
+    """
+    name = "backend"
+
+    def __init__(self, timeout: float = 10.0):
+        self.timeout = timeout
+
+    @abstractmethod
+    def recognize(self, audio: sr.AudioData) -> RecognitionResult:
+        """Transcribe a clip"""
+
+
+class GoogleBackend(RecognizerBackend):
+    """Google Web Speech API through speech_recognition, with a language hint"""
+
+    def __init__(self, recognizer: sr.Recognizer, language: str = "en-US", timeout: float = 10.0):
+        super().__init__(timeout)
+        self.recognizer = recognizer
+        self.language = language
+        self.name = f"google:{language}"
+
+    def recognize(self, audio: sr.AudioData) -> RecognitionResult:
+        response = self.recognizer.recognize_google(audio, language=self.language, show_all=True)
+        if not isinstance(response, dict) or not response.get("alternative"):
+            raise sr.UnknownValueError()
+        # Google only reports confidence for the top alternative, and not always. A missing
+        # confidence counts as confident so the result can still win the race in
+        # ConcurrentRecognizer instead of waiting out every other backend's timeout.
+        best = response["alternative"][0]
+        return RecognitionResult(best["transcript"], best.get("confidence", 1.0), self.name)
+
+
+class OfflineBackend(RecognizerBackend):
+    """Offline stand-in that looks transcripts up by audio hash (tests, demos, replay)"""
+
+    def __init__(self, transcripts: Optional[Dict[str, str]] = None, default: Optional[str] = None,
+                 confidence: float = 1.0, delay: float = 0.0, timeout: float = 10.0, name: str = "offline"):
+        super().__init__(timeout)
+        self.transcripts = dict(transcripts or {})
+        self.default = default
+        self.confidence = confidence
+        self.delay = delay
+        self.name = name
+
+    def add(self, audio: sr.AudioData, text: str):
+        self.transcripts[audio_hash(audio)] = text
+
+    def recognize(self, audio: sr.AudioData) -> RecognitionResult:
+        if self.delay:
+            time.sleep(self.delay)
+        text = self.transcripts.get(audio_hash(audio), self.default)
+        if text is None:
+            raise sr.UnknownValueError()
+        return RecognitionResult(text, self.confidence, self.name)
+
+
+class ConcurrentRecognizer:
+    """Runs several backends on the same clip at once; the first confident result wins.
+
+    Each backend gets its own timeout. If no result reaches min_confidence the most
+    confident one that arrived in time is used. Results are cached by audio hash and
+    backend set (a clip means something else in another language), so replaying a
+    clip costs nothing.
+    """
+
+    def __init__(self, backends: List[RecognizerBackend], min_confidence: float = 0.6,
+                 cache_size: int = 256, max_workers: Optional[int] = None):
+        self.backends = list(backends)
+        self.min_confidence = min_confidence
+        self.cache_size = cache_size
+        # Spare workers so abandoned (still running) calls don't delay the next turn
+        self.executor = ThreadPoolExecutor(max_workers=max_workers or max(4, 2 * len(self.backends)),
+                                           thread_name_prefix="recognizer")
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+
+    def set_backends(self, backends: List[RecognizerBackend]):
+        self.backends = list(backends)
+
+    def recognize(self, audio: sr.AudioData) -> RecognitionResult:
+        backends = self.backends  # Stays consistent with the key if set_backends runs meanwhile
+        key = (tuple(backend.name for backend in backends), audio_hash(audio))
+        with self._cache_lock:
+            cached = self._cache.get(key)
+            if cached is not None:
+                self._cache.move_to_end(key)
+                return cached
+
+        result = self._recognize_concurrently(audio, backends)
+
+        with self._cache_lock:
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return result
+
+    def recognize_partial(self, audio: sr.AudioData) -> RecognitionResult:
+        """Interim transcript of the audio so far: the primary backend only, and not cached"""
+        if not self.backends:
+            raise sr.UnknownValueError()
+        return self.backends[0].recognize(audio)
+
+    def _recognize_concurrently(self, audio: sr.AudioData, backends: List[RecognizerBackend]) -> RecognitionResult:
+        started = time.monotonic()
+        futures = {self.executor.submit(backend.recognize, audio): backend for backend in backends}
+        deadline = started + max(backend.timeout for backend in backends)
+        pending = set(futures)
+        best = None
+        errors = []
+
+        try:
+            while pending:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                for future in done:
+                    backend = futures[future]
+                    if time.monotonic() - started > backend.timeout:
+                        continue  # Arrived after this backend's own deadline
+                    try:
+                        result = future.result()
+                    except sr.UnknownValueError:
+                        continue
+                    except Exception as e:
+                        errors.append(e)
+                        continue
+                    if result.confidence >= self.min_confidence:
+                        return result
+                    if best is None or result.confidence > best.confidence:
+                        best = result
+        finally:
+            # Drop the losers; calls already in flight finish in the background
+            for future in futures:
+                future.cancel()
+
+        if best is not None:
+            return best
+        if errors and len(errors) == len(futures):
+            # Every backend failed outright (e.g. no network): surface the service error
+            error = errors[0]
+            raise error if isinstance(error, sr.RequestError) else sr.RequestError(str(error))
+        raise sr.UnknownValueError()
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False)
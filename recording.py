@@ -0,0 +1,177 @@
+import mmap
+import os
+import struct
+import threading
+from typing import Iterator, List, Optional
+
+# File signature and format version
+MAGIC = b"VRREC003"
+
+# Fixed-size header in front of every turn; the variable-length payload follows:
+# scenario id, recognized text, AI response, the response without vocabulary review
+# (UTF-8; empty when review didn't change it) and then the raw PCM audio.
+TURN_HEADER = struct.Struct(
+    "<I"    # record length in bytes, header included
+    "d"     # wall-clock time the turn started
+    "fff"   # capture, recognize and respond durations (seconds)
+    "IH"    # sample rate, sample width
+    "H"     # scenario id length
+    "IIII"  # text, response, unreviewed response and audio lengths
+)
+
+# Older recordings don't store the unreviewed response; it is read as the response itself
+LEGACY_TURN_HEADERS = {
+    b"VRREC001": struct.Struct("<IdfffIHHIII"),
+    b"VRREC002": struct.Struct("<IdfffIHBHIII"),  # With a flags byte that is no longer used
+}
+
+
+class RecordedTurn:
+    """One recorded turn; the audio stays in the memory-mapped file until audio_data() is called"""
+    __slots__ = ("started", "capture_seconds", "recognize_seconds", "respond_seconds",
+                 "sample_rate", "sample_width", "scenario", "text", "response", "unreviewed_response",
+                 "_audio")
+
+    def __init__(self, started: float, capture_seconds: float, recognize_seconds: float,
+                 respond_seconds: float, sample_rate: int, sample_width: int, scenario: str,
+                 text: str, response: str, unreviewed_response: str, audio: memoryview):
+        self.started = started
+        self.capture_seconds = capture_seconds
+        self.recognize_seconds = recognize_seconds
+        self.respond_seconds = respond_seconds
+        self.sample_rate = sample_rate
+        self.sample_width = sample_width
+        self.scenario = scenario
+        self.text = text
+        self.response = response
+        self.unreviewed_response = unreviewed_response  # The reply with vocabulary review off
+        self._audio = audio
+
+    @property
+    def audio_bytes(self) -> bytes:
+        return bytes(self._audio)
+
+    def audio_data(self):
+        """The captured utterance as speech_recognition AudioData"""
+        import speech_recognition as sr
+        return sr.AudioData(self.audio_bytes, self.sample_rate, self.sample_width)
+
+
+class SessionRecorder:
+    """Appends conversation turns (audio, transcript, response, timings) to a binary recording"""
+
+    def __init__(self, path: str):
+        self.path = path
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self._file = open(path, "ab")
+        if self._file.tell() == 0:
+            self._file.write(MAGIC)
+        else:
+            with open(path, "rb") as f:
+                magic = f.read(len(MAGIC))
+            if magic != MAGIC:
+                self._file.close()
+                raise ValueError(f"{path} is not a current session recording; record to a new file")
+        self._lock = threading.Lock()
+
+    def record(self, started: float, scenario: str, text: str, response: str, audio,
+               capture_seconds: float, recognize_seconds: float, respond_seconds: float,
+               unreviewed_response: Optional[str] = None):
+        """Write one turn; audio is the sr.AudioData handed to the recognizer.
+
+        unreviewed_response is the reply the app would have given with vocabulary
+        review off, when review chose a different one.
+        """
+        scenario_bytes = scenario.encode("utf-8")
+        text_bytes = text.encode("utf-8")
+        response_bytes = response.encode("utf-8")
+        unreviewed_bytes = unreviewed_response.encode("utf-8") if unreviewed_response not in (None, response) else b""
+        frames = audio.frame_data
+        length = (TURN_HEADER.size + len(scenario_bytes) + len(text_bytes) + len(response_bytes)
+                  + len(unreviewed_bytes) + len(frames))
+        header = TURN_HEADER.pack(length, started, capture_seconds, recognize_seconds, respond_seconds,
+                                  audio.sample_rate, audio.sample_width, len(scenario_bytes),
+                                  len(text_bytes), len(response_bytes), len(unreviewed_bytes), len(frames))
+        with self._lock:
+            self._file.write(b"".join((header, scenario_bytes, text_bytes, response_bytes, unreviewed_bytes,
+                                       frames)))
+            self._file.flush()
+
+    def close(self):
+        with self._lock:
+            self._file.close()
+
+
+class Recording:
+    """Memory-mapped reader for a SessionRecorder file.
+
+    Opening only walks the fixed-size turn headers to index record offsets; text is
+    decoded per turn on access and audio is sliced out of the map without copying.
+    A record cut short (e.g. by a crash while writing) ends the recording.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size < len(MAGIC):
+            self._file.close()
+            raise ValueError(f"{path} is not a session recording")
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic = self._map[:len(MAGIC)]
+        self._header = TURN_HEADER if magic == MAGIC else LEGACY_TURN_HEADERS.get(magic)
+        if self._header is None:
+            self.close()
+            raise ValueError(f"{path} is not a session recording")
+        self._view = memoryview(self._map)
+        self._offsets: List[int] = []
+
+        offset = len(MAGIC)
+        while offset + self._header.size <= size:
+            length = struct.unpack_from("<I", self._map, offset)[0]
+            if length < self._header.size or offset + length > size:
+                break
+            self._offsets.append(offset)
+            offset += length
+
+    def __len__(self) -> int:
+        return len(self._offsets)
+
+    def __getitem__(self, index: int) -> RecordedTurn:
+        offset = self._offsets[index]
+        header = self._header.unpack_from(self._map, offset)
+        started, capture_seconds, recognize_seconds, respond_seconds, sample_rate, sample_width = header[1:7]
+        # Payload lengths end the header: scenario, text, response(, unreviewed response), audio
+        lengths = header[-5:-1] if self._header is TURN_HEADER else header[-4:-1]
+        position = offset + self._header.size
+        fields = []
+        for length in lengths:
+            fields.append(bytes(self._view[position:position + length]).decode("utf-8"))
+            position += length
+        scenario, text, response, unreviewed_response = (fields + [""])[:4]
+        audio = self._view[position:position + header[-1]]
+        return RecordedTurn(started, capture_seconds, recognize_seconds, respond_seconds, sample_rate,
+                            sample_width, scenario, text, response, unreviewed_response or response, audio)
+
+    def __iter__(self) -> Iterator[RecordedTurn]:
+        for index in range(len(self._offsets)):
+            yield self[index]
+
+    def close(self):
+        # Slices handed out in RecordedTurn objects must be released before the map can close
+        view: Optional[memoryview] = getattr(self, "_view", None)
+        try:
+            if view is not None:
+                view.release()
+            self._map.close()
+        except BufferError:
+            pass  # Turns still reference the map; it is freed with them
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
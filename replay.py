@@ -0,0 +1,199 @@
+"""Replay recorded sessions through the conversation pipeline.
+
+Sessions recorded with VR_RECORD=path.vrrec are fed back through
+LanguageLearningVR.conversation_loop with no microphone, network or speakers: the
+recorded audio stands in for the capture buffer and an offline backend returns the
+recorded transcript. Replay runs unthrottled by default or at the recorded pace
+with --speed 1, and many sessions are replayed in parallel worker processes. Any
+turn whose response differs from the recorded one is reported as a mismatch.
+Replay has no learner vocabulary to review, so a turn is compared with the reply
+recorded for vocabulary review off.
+
+    VR_RECORD=recordings/alice.vrrec python main.py
+    python replay.py recordings/*.vrrec --workers 8 --repeat 50
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Dict, List
+
+import speech_recognition as sr
+
+os.environ.setdefault("PYGAME_HIDE_SUPPORT_PROMPT", "1")
+
+from recognition import ConcurrentRecognizer, OfflineBackend, RecognitionResult, audio_hash
+from recording import RecordedTurn, Recording
+
+
+class ReplayCapture:
+    """MicrophoneCapture stand-in that returns recorded utterances in order.
+
+    With speed > 0 each utterance is released on the recorded timeline (scaled by
+    speed); with speed 0 they are returned immediately.
+    """
+    is_speaking = False
+    threshold = None  # Derive the speech threshold from each clip
+
+    def __init__(self, turns: List[RecordedTurn], clips: List[sr.AudioData], speed: float = 0.0):
+        self.clips = clips
+        self.speed = speed
+        self._next = 0
+        self._origin = None
+        # Release time of each clip relative to the first turn; gaps never run backwards
+        self._due = []
+        elapsed = 0.0
+        for i, turn in enumerate(turns):
+            if i:
+                elapsed += max(0.0, turn.started - turns[i - 1].started)
+            self._due.append(elapsed + turn.capture_seconds)
+
+    def listen(self, timeout: float = 15, phrase_time_limit: float = 10,
+               on_partial=None, partial_interval: float = 1.0, cancel=None) -> sr.AudioData:
+        if self._next >= len(self.clips):
+            raise sr.WaitTimeoutError("recording exhausted")
+        if self.speed > 0:
+            if self._origin is None:
+                self._origin = time.monotonic() - self._due[0] / self.speed
+            delay = self._origin + self._due[self._next] / self.speed - time.monotonic()
+            if delay > 0:
+                time.sleep(delay)
+        clip = self.clips[self._next]
+        self._next += 1
+        return clip
+
+    def stop(self):
+        pass
+
+
+class ReplayBackend(OfflineBackend):
+    """Returns the recorded transcript for a clip, taking the recorded recognition time at speed > 0"""
+
+    def __init__(self, turns: List[RecordedTurn], clips: List[sr.AudioData], speed: float = 0.0):
+        super().__init__(name="replay")
+        self.speed = speed
+        self.delays = {}
+        for turn, clip in zip(turns, clips):
+            key = audio_hash(clip)
+            self.transcripts[key] = turn.text
+            self.delays[key] = turn.recognize_seconds
+
+    def recognize(self, audio: sr.AudioData) -> RecognitionResult:
+        key = audio_hash(audio)
+        if self.speed > 0:
+            time.sleep(self.delays.get(key, 0.0) / self.speed)
+        text = self.transcripts.get(key)
+        if text is None:
+            raise sr.UnknownValueError()
+        return RecognitionResult(text, self.confidence, self.name)
+
+
+def replay_session(path: str, speed: float = 0.0, repeat: int = 1) -> Dict:
+    """Replay one recording (repeat times over) in a headless app and report the outcome"""
+    # Imported here so worker processes only pull in pygame once they run
+    from main import LanguageLearningVR
+
+    started = time.perf_counter()
+    with Recording(path) as recording:
+        turns = list(recording) * repeat
+        clips = [turn.audio_data() for turn in turns]
+
+    report = {"path": path, "turns": 0, "failed": 0, "steered": 0, "mismatches": []}
+    if not turns:
+        return dict(report, elapsed=0.0, latency={})
+
+    with tempfile.TemporaryDirectory(prefix="vr-replay-") as workdir, \
+            open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        app = LanguageLearningVR.headless(workdir, metrics_enabled=True)
+        try:
+            backend = ReplayBackend(turns, clips, speed)
+            app.capture = ReplayCapture(turns, clips, speed)
+            # Every turn goes through recognition, even when a clip repeats
+            app.speech_recognizer = ConcurrentRecognizer([backend], cache_size=0)
+            app.set_component_status("mic", "ready")
+
+            for index, turn in enumerate(turns):
+                if app.current_scenario is None or app.current_scenario["id"] != turn.scenario:
+                    if turn.scenario not in app.scenarios:
+                        report["failed"] += 1
+                        app.capture.listen()  # Skip this turn's clip
+                        continue
+                    app.select_scenario(turn.scenario)
+                    app.speech_recognizer.set_backends([backend])
+
+                completed = app.metrics.counters.get("turns", 0)
+                # Returns once the turn has been scored and its response "spoken"
+                app.conversation_loop()
+
+                if app.metrics.counters.get("turns", 0) == completed:
+                    report["failed"] += 1
+                    continue
+                report["turns"] += 1
+                if turn.unreviewed_response != turn.response:
+                    report["steered"] += 1  # Vocabulary review picked another reply when this was recorded
+                response = app.conversation_history[-1].text
+                if response != turn.unreviewed_response:
+                    report["mismatches"].append({"turn": index, "scenario": turn.scenario, "input": turn.text,
+                                                 "expected": turn.unreviewed_response, "actual": response})
+
+            snapshot = app.metrics.snapshot()["timers"]
+        finally:
+            app.shutdown()
+
+    latency = {name: {key: round(value * 1000, 3) for key, value in stats.items() if key.startswith("p")}
+               for name, stats in snapshot.items() if name != "frame"}
+    return dict(report, elapsed=time.perf_counter() - started, latency=latency)
+
+
+def replay_many(paths: List[str], speed: float = 0.0, repeat: int = 1, workers: int = None):
+    """Replay recordings in parallel worker processes, yielding each session report as it finishes"""
+    workers = workers or min(len(paths), os.cpu_count() or 1)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(replay_session, path, speed, repeat): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                yield future.result()
+            except Exception as e:
+                yield {"path": futures[future], "turns": 0, "failed": 0, "steered": 0, "mismatches": [],
+                       "error": str(e)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay recorded sessions through the conversation pipeline")
+    parser.add_argument("recordings", nargs="+", help="Session recordings written with VR_RECORD")
+    parser.add_argument("--speed", type=float, default=0.0,
+                        help="Playback speed: 1 replays at the recorded pace, 0 (default) runs unthrottled")
+    parser.add_argument("--repeat", type=int, default=1, help="Replay each recording this many times over")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("-o", "--output", help="Write the full per-session report as JSON")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    reports = []
+    for report in replay_many(args.recordings, args.speed, max(1, args.repeat), args.workers):
+        reports.append(report)
+        status = report.get("error") or (f"{len(report['mismatches'])} mismatches, {report['steered']} review-steered, "
+                                         f"{report['failed']} failed")
+        turn = report.get("latency", {}).get("turn", {})
+        print(f"{report['path']}: {report['turns']} turns, {status}, turn p50 {turn.get('p50', 0):.1f} ms "
+              f"p95 {turn.get('p95', 0):.1f} ms", file=sys.stderr)
+    elapsed = time.perf_counter() - start
+
+    turns = sum(report["turns"] for report in reports)
+    problems = sum(len(report["mismatches"]) + report["failed"] + ("error" in report) for report in reports)
+    print(f"Replayed {turns} turns from {len(reports)} sessions in {elapsed:.1f}s "
+          f"({turns / elapsed * 60:.0f} turns/min), {problems} problem(s)", file=sys.stderr)
+
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump({"elapsed": elapsed, "turns": turns, "sessions": reports}, f, indent=2)
+    if problems:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
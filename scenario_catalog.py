@@ -0,0 +1,234 @@
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
+
+from keyword_matcher import KeywordMatcher
+
+# Bump when the cached index/scenario layout changes so stale caches are ignored
+CACHE_VERSION = 2
+
+# Scenario fields kept in the startup index; everything else is loaded on demand
+INDEX_FIELDS = ("id", "name", "language", "tags", "key", "icon", "label")
+
+# Keys (pygame key names) the app already binds; a scenario can't take them over
+RESERVED_KEYS = frozenset(("q", "h", "space", "f3", "up", "down", "page up", "page down"))
+
+# A scenario with dialogue states starts each conversation in this one
+INITIAL_STATE = "initial"
+
+
+class ScenarioCatalog:
+    """Directory of JSON scenarios with a lightweight index and on-demand loading.
+
+    At startup only file metadata is read: the index (id, name, language, tags,
+    key binding) comes from a pickled index cache that is invalidated per file by
+    mtime and size. Full scenario bodies are parsed when first requested, kept in
+    an LRU of recently used scenarios, and stored together with their compiled
+    KeywordMatcher in a binary cache so later runs skip JSON parsing entirely.
+
+    A scenario may also define "states" for multi-step dialogues: each state has its
+    own keywords and responses, and each response may name the next_state. Every
+    state gets its own matcher.
+    """
+
+    def __init__(self, directory: str, cache_dir: Optional[str] = None, max_loaded: int = 32):
+        self.directory = directory
+        self.cache_dir = cache_dir or os.path.join(directory, ".cache")
+        self.max_loaded = max_loaded
+        self.index: Dict[str, Dict] = {}
+        self._loaded = OrderedDict()  # id -> (scenario, matcher)
+        self.refresh()
+
+    def __contains__(self, scenario_id: str) -> bool:
+        return scenario_id in self.index
+
+    def __getitem__(self, scenario_id: str) -> Dict:
+        return self.get(scenario_id)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def refresh(self):
+        """Rebuild the index from file metadata, parsing only files changed since the cached index"""
+        cached = self._read_cache(self._index_cache_path()) or {}
+        entries = {}
+        index = {}
+
+        try:
+            files = [entry for entry in os.scandir(self.directory)
+                     if entry.is_file() and entry.name.endswith(".json")]
+        except FileNotFoundError:
+            files = []
+
+        for entry in sorted(files, key=lambda e: e.name):
+            stat = entry.stat()
+            signature = (stat.st_mtime_ns, stat.st_size)
+            hit = cached.get(entry.name)
+            scenario = None
+            if hit and hit[0] == signature:
+                meta = hit[1]
+            else:
+                try:
+                    scenario = self._parse(entry.path)
+                except (OSError, ValueError) as e:
+                    print(f"Skipping scenario file {entry.name}: {e}")
+                    continue
+                meta = {field: scenario.get(field) for field in INDEX_FIELDS}
+
+            # Files are indexed in name order, so the first one to use an id keeps it
+            if meta["id"] in index:
+                print(f"⚠️ Skipping scenario file {entry.name}: id '{meta['id']}' is already used by "
+                      f"{os.path.basename(index[meta['id']]['path'])}")
+                continue
+            if scenario is not None:
+                self._write_cache(self._scenario_cache_path(meta["id"]), (signature,) + self._compile(scenario))
+
+            entries[entry.name] = (signature, meta)
+            index[meta["id"]] = dict(meta, path=entry.path)
+
+        if entries != cached:
+            self._write_cache(self._index_cache_path(), entries)
+        self.index = index
+        self._loaded.clear()
+
+    def get(self, scenario_id: str) -> Dict:
+        """Full scenario body, loaded from the LRU, the binary cache, or the JSON file"""
+        return self._load(scenario_id)[0]
+
+    def matcher(self, scenario_id: str, state: Optional[str] = None) -> KeywordMatcher:
+        """Compiled keyword matcher for a scenario, or for one of its dialogue states"""
+        loaded = self._load(scenario_id)
+        return loaded[2][state] if state is not None else loaded[1]
+
+    def key_bindings(self) -> Dict[str, str]:
+        """Map of key name (e.g. "r") to scenario id for scenarios that declare a key (reserved keys are skipped)"""
+        bindings = {}
+        for scenario_id, meta in self.index.items():
+            key = (meta.get("key") or "").lower()
+            if not key:
+                continue
+            if key in RESERVED_KEYS:
+                print(f"⚠️ Scenario '{scenario_id}' uses reserved key '{key}'; it can't be chosen from the keyboard")
+                continue
+            bindings[key] = scenario_id
+        return bindings
+
+    def search(self, language: Optional[str] = None, tag: Optional[str] = None) -> List[Dict]:
+        """Index entries filtered by language and/or tag"""
+        return [meta for meta in self.index.values()
+                if (language is None or meta.get("language") == language)
+                and (tag is None or tag in (meta.get("tags") or []))]
+
+    def _load(self, scenario_id: str) -> Tuple[Dict, KeywordMatcher, Dict[str, KeywordMatcher]]:
+        loaded = self._loaded.get(scenario_id)
+        if loaded is not None:
+            self._loaded.move_to_end(scenario_id)
+            return loaded
+
+        meta = self.index[scenario_id]
+        stat = os.stat(meta["path"])
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cache_path = self._scenario_cache_path(scenario_id)
+
+        cached = self._read_cache(cache_path)
+        if cached and cached[0] == signature:
+            loaded = cached[1:]
+        else:
+            loaded = self._compile(self._parse(meta["path"]))
+            self._write_cache(cache_path, (signature,) + loaded)
+
+        self._loaded[scenario_id] = loaded
+        if len(self._loaded) > self.max_loaded:
+            self._loaded.popitem(last=False)
+        return loaded
+
+    @staticmethod
+    def _compile(scenario: Dict) -> Tuple[Dict, KeywordMatcher, Dict[str, KeywordMatcher]]:
+        """A scenario with its matcher and one matcher per dialogue state"""
+        states = {name: KeywordMatcher.from_scenario(state) for name, state in scenario.get("states", {}).items()}
+        return scenario, KeywordMatcher.from_scenario(scenario), states
+
+    def _parse(self, path: str) -> Dict:
+        with open(path, encoding="utf-8") as f:
+            scenario = json.load(f)
+        if not isinstance(scenario, dict):
+            raise ValueError("a scenario must be a JSON object")
+        scenario.setdefault("id", os.path.splitext(os.path.basename(path))[0])
+        scenario.setdefault("name", scenario["id"])
+        self._validate(scenario)
+        return scenario
+
+    @staticmethod
+    def _validate(scenario: Dict):
+        """Raise ValueError unless the scenario has the fields the app and KeywordMatcher rely on"""
+        if not isinstance(scenario["id"], str) or not scenario["id"]:
+            raise ValueError("'id' must be a non-empty string")
+        if not isinstance(scenario.get("initial_prompt"), str):
+            raise ValueError("'initial_prompt' must be a string")
+        responses = scenario.get("responses")
+        if not isinstance(responses, dict) or not all(isinstance(text, str) for text in responses.values()):
+            raise ValueError("'responses' must be an object mapping intents to reply strings")
+        if "default" not in responses:
+            raise ValueError("'responses' needs a 'default' reply")
+        ScenarioCatalog._validate_keywords(scenario.get("keywords", {}), "'keywords'")
+
+        states = scenario.get("states")
+        if states is None:
+            return
+        if not isinstance(states, dict) or INITIAL_STATE not in states:
+            raise ValueError(f"'states' must be an object with an '{INITIAL_STATE}' state")
+        for name, state in states.items():
+            responses = state.get("responses") if isinstance(state, dict) else None
+            if not isinstance(responses, dict) or "default" not in responses:
+                raise ValueError(f"state '{name}' needs 'responses' with a 'default' reply")
+            for intent, reply in responses.items():
+                if not isinstance(reply, dict) or not isinstance(reply.get("text"), str):
+                    raise ValueError(f"reply '{intent}' of state '{name}' must be an object with a 'text' string")
+                if reply.get("next_state", name) not in states:
+                    raise ValueError(f"reply '{intent}' of state '{name}' goes to unknown state '{reply['next_state']}'")
+            ScenarioCatalog._validate_keywords(state.get("keywords", {}), f"'keywords' of state '{name}'")
+
+    @staticmethod
+    def _validate_keywords(keywords, where: str):
+        if not isinstance(keywords, dict) or not all(isinstance(phrases, list) for phrases in keywords.values()):
+            raise ValueError(f"{where} must be an object mapping intents to lists of phrases")
+
+    def _index_cache_path(self) -> str:
+        return os.path.join(self.cache_dir, "index.pickle")
+
+    def _scenario_cache_path(self, scenario_id: str) -> str:
+        # Ids are free-form (e.g. "fr/restaurant"), so they are hashed into a safe file name
+        digest = hashlib.sha1(scenario_id.encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"scenario-{digest}.pickle")
+
+    def _read_cache(self, path: str):
+        try:
+            with open(path, "rb") as f:
+                version, payload = pickle.load(f)
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            print(f"Ignoring unreadable scenario cache {path}: {e}")
+            return None
+        return payload if version == CACHE_VERSION else None
+
+    def _write_cache(self, path: str, payload):
+        """Atomically write a cache file; a read-only scenario directory just disables caching"""
+        tmp_path = None
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".tmp")
+            with os.fdopen(fd, "wb") as f:
+                pickle.dump((CACHE_VERSION, payload), f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print(f"Could not write scenario cache {path}: {e}")
+            if tmp_path is not None:
+                try:
+                    os.unlink(tmp_path)
+                except OSError:
+                    pass
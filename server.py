@@ -0,0 +1,407 @@
+"""Multi-session conversation server with a local web front end.
+
+Serves index.html and exposes the conversation engine (scenario responses and
+scoring) to many learners at once over HTTP/1.1 JSON endpoints and WebSocket,
+using only asyncio and the standard library. Sessions are compact objects with a
+bounded history, kept in an LRU store capped by count and idle time.
+
+    python server.py --port 8000
+    # then open http://localhost:8000/
+
+HTTP API (JSON bodies):
+    GET    /api/scenarios                  scenario index
+    POST   /api/sessions                   create a session
+    GET    /api/sessions/<id>              progress, scenario and recent history
+    POST   /api/sessions/<id>/scenario     {"scenario": "restaurant"}
+    POST   /api/sessions/<id>/turn         {"text": "Can I see the menu?"}
+    DELETE /api/sessions/<id>
+    GET    /api/stats                      session count and request latency
+
+WebSocket /ws[?session=<id>]: send {"type": "start", "scenario": ...} or
+{"type": "turn", "text": ...}; replies carry the same payloads as the HTTP API.
+"""
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import struct
+import time
+from collections import OrderedDict
+from http import HTTPStatus
+from typing import Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+from conversation_engine import ConversationEngine, ConversationSession
+from metrics import Metrics
+from scenario_catalog import ScenarioCatalog
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+SCENARIO_DIR = os.path.join(BASE_DIR, "scenarios")
+INDEX_PATH = os.path.join(BASE_DIR, "index.html")
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+OP_CONTINUATION, OP_TEXT, OP_BINARY, OP_CLOSE, OP_PING, OP_PONG = 0x0, 0x1, 0x2, 0x8, 0x9, 0xA
+
+# Largest request body or WebSocket message accepted
+MAX_MESSAGE_SIZE = 64 * 1024
+MAX_HEADERS = 100
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str = ""):
+        super().__init__(message or HTTPStatus(status).phrase)
+        self.status = status
+
+
+class SessionStore:
+    """Sessions by id in least-recently-used order, bounded by count and idle time"""
+
+    def __init__(self, max_sessions: int = 10000, idle_timeout: float = 1800.0, history_size: int = 20):
+        self.max_sessions = max_sessions
+        self.idle_timeout = idle_timeout
+        self.history_size = history_size
+        self._sessions: "OrderedDict[str, ConversationSession]" = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+    def create(self) -> ConversationSession:
+        session = ConversationSession(history_size=self.history_size)
+        self._sessions[session.id] = session
+        while len(self._sessions) > self.max_sessions:
+            self._sessions.popitem(last=False)  # Evict the least recently used
+        return session
+
+    def get(self, session_id: str) -> Optional[ConversationSession]:
+        session = self._sessions.get(session_id)
+        if session is not None:
+            # Any access counts as activity, so the LRU order stays the last_active order expire() relies on
+            session.last_active = time.monotonic()
+            self._sessions.move_to_end(session_id)
+        return session
+
+    def remove(self, session_id: str) -> bool:
+        return self._sessions.pop(session_id, None) is not None
+
+    def expire(self) -> int:
+        """Drop sessions idle for longer than idle_timeout; returns how many were dropped"""
+        cutoff = time.monotonic() - self.idle_timeout
+        expired = 0
+        # LRU order means the idle sessions are at the front
+        while self._sessions:
+            session = next(iter(self._sessions.values()))
+            if session.last_active > cutoff:
+                break
+            self._sessions.popitem(last=False)
+            expired += 1
+        return expired
+
+
+def encode_frame(opcode: int, payload: bytes, mask: bool = False) -> bytes:
+    """A single final WebSocket frame; clients must mask, servers must not"""
+    length = len(payload)
+    if length < 126:
+        header = struct.pack("!BB", 0x80 | opcode, (0x80 if mask else 0) | length)
+    elif length < 1 << 16:
+        header = struct.pack("!BBH", 0x80 | opcode, (0x80 if mask else 0) | 126, length)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, (0x80 if mask else 0) | 127, length)
+    if not mask:
+        return header + payload
+    key = os.urandom(4)
+    return header + key + apply_mask(payload, key)
+
+
+def apply_mask(payload: bytes, key: bytes) -> bytes:
+    """XOR a payload with a 4-byte WebSocket masking key"""
+    if not payload:
+        return payload
+    repeated = (key * (len(payload) // 4 + 1))[:len(payload)]
+    masked = int.from_bytes(payload, "big") ^ int.from_bytes(repeated, "big")
+    return masked.to_bytes(len(payload), "big")
+
+
+async def read_frame(reader: asyncio.StreamReader, max_size: int = MAX_MESSAGE_SIZE) -> Tuple[bool, int, bytes]:
+    """Read one WebSocket frame: (final, opcode, unmasked payload)"""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack("!Q", await reader.readexactly(8))[0]
+    if length > max_size:
+        raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+    key = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    return bool(first & 0x80), first & 0x0F, apply_mask(payload, key) if key else payload
+
+
+async def read_message(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                       max_size: int = MAX_MESSAGE_SIZE) -> Optional[bytes]:
+    """Next complete data message, answering pings on the way; None once the peer closes"""
+    parts = []
+    size = 0
+    while True:
+        final, opcode, payload = await read_frame(reader, max_size)
+        if opcode == OP_CLOSE:
+            writer.write(encode_frame(OP_CLOSE, payload[:2]))
+            return None
+        if opcode == OP_PING:
+            writer.write(encode_frame(OP_PONG, payload))
+            continue
+        if opcode == OP_PONG:
+            continue
+        size += len(payload)
+        if size > max_size:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        parts.append(payload)
+        if final:
+            return b"".join(parts)
+
+
+class ConversationServer:
+    """HTTP/1.1 (keep-alive) and WebSocket front end for a ConversationEngine"""
+
+    def __init__(self, engine: ConversationEngine, store: SessionStore, keepalive_timeout: float = 30.0):
+        self.engine = engine
+        self.store = store
+        self.keepalive_timeout = keepalive_timeout
+        self.metrics = Metrics(enabled=True)
+
+    async def serve(self, host: str, port: int, sweep_interval: float = 60.0):
+        server = await asyncio.start_server(self.handle_connection, host, port, limit=MAX_MESSAGE_SIZE)
+        print(f"🌐 Serving on http://{host}:{port}/")
+        async with server:
+            while True:
+                await asyncio.sleep(sweep_interval)
+                expired = self.store.expire()
+                if expired:
+                    print(f"🧹 Expired {expired} idle sessions ({len(self.store)} active)")
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await asyncio.wait_for(self.read_request(reader), self.keepalive_timeout)
+                except HTTPError as e:
+                    await self.send_json(writer, e.status, {"error": str(e)}, keep_alive=False)
+                    break
+                if request is None:
+                    break
+                method, target, version, headers = request[:4]
+                if headers.get("upgrade", "").lower() == "websocket":
+                    await self.handle_websocket(reader, writer, target, headers)
+                    break
+                keep_alive = (version == "HTTP/1.1" and headers.get("connection", "").lower() != "close")
+                await self.handle_request(writer, *request, keep_alive=keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def read_request(self, reader: asyncio.StreamReader):
+        line = await reader.readline()
+        if not line:
+            return None
+        try:
+            method, target, version = line.decode("latin-1").split()
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST)
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            if len(headers) >= MAX_HEADERS:
+                raise HTTPError(HTTPStatus.REQUEST_HEADER_FIELDS_TOO_LARGE)
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+        try:
+            length = int(headers.get("content-length") or 0)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST)
+        if length > MAX_MESSAGE_SIZE:
+            raise HTTPError(HTTPStatus.REQUEST_ENTITY_TOO_LARGE)
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target, version, headers, body
+
+    async def handle_request(self, writer: asyncio.StreamWriter, method: str, target: str, version: str,
+                             headers: Dict, body: bytes, keep_alive: bool = True):
+        path = urlsplit(target).path
+        with self.metrics.timer("request"):
+            try:
+                if method == "GET" and path in ("/", "/index.html"):
+                    with open(INDEX_PATH, "rb") as f:
+                        await self.send(writer, HTTPStatus.OK, f.read(), "text/html; charset=utf-8", keep_alive)
+                    return
+                status, payload = self.route(method, path, self.parse_json(body))
+            except HTTPError as e:
+                status, payload = e.status, {"error": str(e)}
+            except Exception as e:
+                print(f"❌ Error handling {method} {path}: {e}")
+                status, payload = HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "internal error"}
+        await self.send_json(writer, status, payload, keep_alive)
+
+    def route(self, method: str, path: str, body: Dict) -> Tuple[int, Dict]:
+        parts = [part for part in path.split("/") if part]
+        if parts[:1] != ["api"]:
+            raise HTTPError(HTTPStatus.NOT_FOUND)
+        parts = parts[1:]
+
+        if parts == ["scenarios"] and method == "GET":
+            return HTTPStatus.OK, {"scenarios": self.scenario_index()}
+        if parts == ["stats"] and method == "GET":
+            return HTTPStatus.OK, {"sessions": len(self.store), "metrics": self.metrics.snapshot()}
+        if parts == ["sessions"] and method == "POST":
+            return HTTPStatus.CREATED, self.session_state(self.store.create())
+
+        if len(parts) < 2 or parts[0] != "sessions":
+            raise HTTPError(HTTPStatus.NOT_FOUND)
+        session = self.store.get(parts[1])
+        if session is None:
+            raise HTTPError(HTTPStatus.NOT_FOUND, "Unknown or expired session")
+        action = parts[2:]
+
+        if action == [] and method == "GET":
+            return HTTPStatus.OK, self.session_state(session, include_history=True)
+        if action == [] and method == "DELETE":
+            self.store.remove(session.id)
+            return HTTPStatus.OK, {"session": session.id, "deleted": True}
+        if action == ["scenario"] and method == "POST":
+            return HTTPStatus.OK, self.start_scenario(session, body)
+        if action == ["turn"] and method == "POST":
+            return HTTPStatus.OK, self.take_turn(session, body)
+        raise HTTPError(HTTPStatus.NOT_FOUND)
+
+    def scenario_index(self):
+        return [{field: meta.get(field) for field in ("id", "name", "language", "key", "icon", "label")}
+                for meta in self.engine.catalog.index.values()]
+
+    def session_state(self, session: ConversationSession, include_history: bool = False) -> Dict:
+        state = {"session": session.id, "scenario": session.scenario_id, "dialogue_state": session.state,
+                 "progress": session.progress()}
+        if include_history:
+            state["history"] = [{"speaker": speaker, "text": text} for speaker, text in session.history]
+            if session.scenario_id in self.engine.catalog:
+                state["details"] = self.engine.describe(session.scenario_id)
+        return state
+
+    def start_scenario(self, session: ConversationSession, body: Dict) -> Dict:
+        scenario_id = body.get("scenario")
+        if not isinstance(scenario_id, str):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Expected a scenario id")
+        if scenario_id not in self.engine.catalog:
+            raise HTTPError(HTTPStatus.NOT_FOUND, f"Scenario '{scenario_id}' not found!")
+        return dict(self.engine.start(session, scenario_id), progress=session.progress())
+
+    def take_turn(self, session: ConversationSession, body: Dict) -> Dict:
+        text = body.get("text")
+        if text is not None and not isinstance(text, str):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Expected text to be a string")
+        text = (text or "").strip()
+        if not text:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Missing text")
+        if session.scenario_id is None:
+            raise HTTPError(HTTPStatus.CONFLICT, "Please choose a scenario first!")
+        response, evaluation = self.engine.respond(session, text)
+        return {"response": response, "evaluation": evaluation.to_dict(), "progress": session.progress()}
+
+    @staticmethod
+    def parse_json(body: bytes) -> Dict:
+        if not body:
+            return {}
+        try:
+            data = json.loads(body)
+        except ValueError:
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Invalid JSON")
+        if not isinstance(data, dict):
+            raise HTTPError(HTTPStatus.BAD_REQUEST, "Expected a JSON object")
+        return data
+
+    async def send(self, writer: asyncio.StreamWriter, status: int, body: bytes, content_type: str,
+                   keep_alive: bool = True):
+        head = (f"HTTP/1.1 {int(status)} {HTTPStatus(status).phrase}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+    async def send_json(self, writer: asyncio.StreamWriter, status: int, payload: Dict, keep_alive: bool = True):
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        await self.send(writer, status, body, "application/json; charset=utf-8", keep_alive)
+
+    async def handle_websocket(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                               target: str, headers: Dict):
+        key = headers.get("sec-websocket-key")
+        if not key:
+            await self.send_json(writer, HTTPStatus.BAD_REQUEST, {"error": "Missing Sec-WebSocket-Key"}, False)
+            return
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode("latin-1"))
+
+        # Resume a session (e.g. after a page reload) or start a new one
+        session_id = (parse_qs(urlsplit(target).query).get("session") or [None])[0]
+        session = (self.store.get(session_id) if session_id else None) or self.store.create()
+        await self.send_message(writer, dict(self.session_state(session), type="session"))
+
+        while True:
+            try:
+                data = await read_message(reader, writer)
+            except HTTPError:
+                writer.write(encode_frame(OP_CLOSE, struct.pack("!H", 1009)))  # Message too big
+                break
+            if data is None:
+                break
+            message = {}
+            with self.metrics.timer("message"):
+                try:
+                    message = self.parse_json(data)
+                    kind = message.get("type")
+                    if self.store.get(session.id) is None:
+                        raise HTTPError(HTTPStatus.NOT_FOUND, "Session expired")
+                    if kind == "start":
+                        reply = dict(self.start_scenario(session, message), type="scenario")
+                    elif kind == "turn":
+                        reply = dict(self.take_turn(session, message), type="turn")
+                    else:
+                        raise HTTPError(HTTPStatus.BAD_REQUEST, f"Unknown message type: {kind}")
+                except HTTPError as e:
+                    reply = {"type": "error", "status": int(e.status), "message": str(e)}
+                except Exception as e:
+                    print(f"❌ Error handling WebSocket message: {e}")
+                    reply = {"type": "error", "status": int(HTTPStatus.INTERNAL_SERVER_ERROR),
+                             "message": "internal error"}
+            if "id" in message:
+                reply["id"] = message["id"]  # Lets clients match replies to requests
+            await self.send_message(writer, reply)
+
+    async def send_message(self, writer: asyncio.StreamWriter, payload: Dict):
+        writer.write(encode_frame(OP_TEXT, json.dumps(payload, ensure_ascii=False).encode("utf-8")))
+        await writer.drain()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve the conversation engine to many learners over HTTP/WebSocket")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="Port to listen on (default: 8000)")
+    parser.add_argument("--max-sessions", type=int, default=10000, help="Sessions kept before the least recently used is evicted")
+    parser.add_argument("--idle-timeout", type=float, default=1800.0, help="Seconds before an idle session expires")
+    parser.add_argument("--history", type=int, default=20, help="Messages of history kept per session")
+    args = parser.parse_args(argv)
+
+    engine = ConversationEngine(ScenarioCatalog(SCENARIO_DIR))
+    store = SessionStore(args.max_sessions, args.idle_timeout, args.history)
+    try:
+        asyncio.run(ConversationServer(engine, store).serve(args.host, args.port))
+    except KeyboardInterrupt:
+        print("👋 Server stopped")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+import hashlib
+import itertools
+import os
+import queue
+import tempfile
+import threading
+import time
+from typing import Callable, Iterable, Optional
+
+import pygame
+
+# Queue priorities: lower runs first
+PRIORITY_SPEAK = 0
+PRIORITY_WARM = 10
+
+
+class SilentEngine:
+    """pyttsx3 stand-in that accepts every call and produces no audio (headless runs)"""
+
+    def setProperty(self, name, value):
+        pass
+
+    def getProperty(self, name):
+        return "silent"
+
+    def connect(self, topic, callback):
+        pass
+
+    def say(self, text):
+        pass
+
+    def save_to_file(self, text, path):
+        pass
+
+    def runAndWait(self):
+        pass
+
+    def stop(self):
+        pass
+
+
+class TTSWorker(threading.Thread):
+    """Single thread that owns the (non-thread-safe) pyttsx3 engine.
+
+    Lines are spoken in priority order from a queue. Known lines can be synthesized
+    ahead of time into an on-disk cache keyed by (text, voice, rate) and are then
+    played instantly through pygame.mixer instead of being synthesized again.
+    interrupt() barges in on the current line and drops pending ones.
+    """
+
+    def __init__(self, cache_dir: Optional[str] = None, rate: int = 150, volume: float = 0.9,
+                 engine_factory: Optional[Callable] = None):
+        super().__init__(daemon=True, name="tts")
+        self.cache_dir = cache_dir
+        self.rate = rate
+        self.volume = volume
+        self.engine_factory = engine_factory
+        self.engine = None
+        self.voice = None
+
+        self.ready = threading.Event()
+        self.error = None
+        self._queue = queue.PriorityQueue()
+        self._sequence = itertools.count()  # FIFO order within a priority
+        self._interrupted = threading.Event()
+        self._speaking = threading.Event()
+        self._generation = 0  # Bumped by interrupt(); older speak requests are dropped
+        self._speaking_generation = 0  # Generation of the line being spoken
+
+    @property
+    def is_speaking(self) -> bool:
+        return self._speaking.is_set()
+
+    def speak(self, text: str, on_done: Optional[Callable[[], None]] = None, priority: int = PRIORITY_SPEAK):
+        """Queue a line to be spoken; on_done runs on the worker once it finished or was interrupted"""
+        self._queue.put((priority, next(self._sequence), "speak", text, on_done, self._generation))
+
+    def warm(self, texts: Iterable[str]):
+        """Synthesize lines into the cache in the background so they play instantly later"""
+        if not self.cache_dir:
+            return
+        for text in texts:
+            self._queue.put((PRIORITY_WARM, next(self._sequence), "warm", text, None, self._generation))
+
+    def interrupt(self):
+        """Stop the current line and drop queued ones (barge-in)"""
+        self._generation += 1
+        if self._speaking.is_set():
+            self._interrupted.set()
+
+    def stop(self):
+        self.interrupt()
+        self._queue.put((-1, next(self._sequence), "stop", None, None, self._generation))
+
+    def cache_path(self, text: str) -> str:
+        key = hashlib.sha1(f"{text}|{self.voice}|{self.rate}".encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def run(self):
+        try:
+            engine_factory = self.engine_factory
+            if engine_factory is None:
+                # Imported here so loading the TTS driver never delays the first frame
+                import pyttsx3
+                engine_factory = pyttsx3.init
+            self.engine = engine_factory()
+            self.engine.setProperty('rate', self.rate)  # Speed of speech
+            self.engine.setProperty('volume', self.volume)  # Volume level
+            self.voice = self.engine.getProperty('voice')
+            # Lets interrupt() stop live synthesis from inside the engine's own loop
+            self.engine.connect('started-word', self._on_word)
+        except Exception as e:
+            self.error = e
+            print(f"TTS setup error: {e}")
+        self.ready.set()
+
+        while True:
+            _, _, kind, text, on_done, generation = self._queue.get()
+            if kind == "stop":
+                break
+            if self.engine is None:
+                print(f"🤖 (no TTS) {text}")
+            elif kind == "speak" and generation == self._generation:
+                self._speak(text, generation)
+            elif kind == "warm":
+                self._synthesize(text)
+            if on_done:
+                on_done()
+
+    def _stale(self) -> bool:
+        # interrupt() only sets _interrupted while _speaking is set, so a barge-in that lands
+        # between the queue's generation check and _speaking.set() shows up as a newer generation
+        return self._interrupted.is_set() or self._speaking_generation != self._generation
+
+    def _on_word(self, name, location, length):
+        if self._stale():
+            self.engine.stop()
+
+    def _speak(self, text: str, generation: int):
+        self._interrupted.clear()
+        self._speaking_generation = generation
+        self._speaking.set()
+        try:
+            if self._stale():
+                return
+            path = self.cache_path(text) if self.cache_dir else None
+            if path and os.path.exists(path) and pygame.mixer.get_init():
+                self._play(path)
+            else:
+                self.engine.say(text)
+                self.engine.runAndWait()
+        except Exception as e:
+            print(f"TTS Error: {e}")
+        finally:
+            self._speaking.clear()
+
+    def _play(self, path: str):
+        channel = pygame.mixer.Sound(path).play()
+        while channel is not None and channel.get_busy():
+            if self._stale():
+                channel.stop()
+                break
+            time.sleep(0.02)
+
+    def _synthesize(self, text: str):
+        path = self.cache_path(text)
+        if os.path.exists(path):
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix=".wav")
+            os.close(fd)
+            self.engine.save_to_file(text, tmp_path)
+            self.engine.runAndWait()
+            if os.path.getsize(tmp_path):
+                os.replace(tmp_path, path)
+            else:
+                os.remove(tmp_path)
+        except Exception as e:
+            print(f"TTS cache error: {e}")
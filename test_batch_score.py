@@ -0,0 +1,27 @@
+from batch_score import score_texts
+from evaluation import ResponseEvaluator
+
+TEXTS = [
+    "",
+    "Hi",
+    "Yes please",
+    "I would like the menu, please",
+    "Thanks! Could I have the bill? The the the the",
+    "Excuse me, do you have this shirt in a larger size for my brother?",
+    "   spaced    out   words   ",
+    "Je voudrais un café, s'il vous plaît",
+]
+
+
+def test_score_texts_matches_response_evaluator():
+    evaluator = ResponseEvaluator()
+    expected = []
+    for text in TEXTS:
+        evaluation = evaluator.evaluate(text).to_dict()
+        del evaluation["details"]
+        expected.append(evaluation)
+    assert score_texts(TEXTS) == expected
+
+
+def test_score_texts_empty_batch():
+    assert score_texts([]) == []
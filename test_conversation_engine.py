@@ -0,0 +1,39 @@
+import os
+
+from conversation_engine import OFF_TOPIC_FEEDBACK, ConversationEngine, ConversationSession
+from scenario_catalog import INITIAL_STATE, ScenarioCatalog
+
+SCENARIO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios")
+
+
+def test_session_follows_scenario_dialogue_states(tmp_path):
+    engine = ConversationEngine(ScenarioCatalog(SCENARIO_DIR, cache_dir=str(tmp_path)))
+    session = ConversationSession()
+    engine.start(session, "restaurant")
+    assert session.state == INITIAL_STATE
+
+    steps = [
+        ("Hello there", INITIAL_STATE),
+        ("Could I see the menu please", "ordering"),
+        ("The pasta, please", "drink"),
+        ("Just water", "additional"),
+        ("Nothing else, thank you", "complete"),
+    ]
+    for text, state in steps:
+        engine.respond(session, text)
+        assert session.state == state
+    response, evaluation = engine.respond(session, "Goodbye")
+    assert response.startswith("Thank you for dining with us!")
+    assert OFF_TOPIC_FEEDBACK not in evaluation.feedback
+
+    engine.start(session, "restaurant")
+    assert session.state == INITIAL_STATE
+
+
+def test_off_topic_feedback_in_a_dialogue_state(tmp_path):
+    engine = ConversationEngine(ScenarioCatalog(SCENARIO_DIR, cache_dir=str(tmp_path)))
+    session = ConversationSession()
+    engine.start(session, "shopping")
+    response, evaluation = engine.respond(session, "What is the weather like today")
+    assert response == "Can I help you find something specific today?"
+    assert OFF_TOPIC_FEEDBACK in evaluation.feedback
@@ -0,0 +1,38 @@
+import json
+import os
+
+import pytest
+
+from conversation_engine import ConversationEngine
+from keyword_matcher import KeywordMatcher
+
+SCENARIO_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "scenarios")
+
+
+def load_scenario(name):
+    with open(os.path.join(SCENARIO_DIR, f"{name}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize("text, intent", [
+    ("I would like to see the menu", "menu"),
+    ("I would like a glass of water", "drink"),
+    ("I would like to pay the bill please", "bill"),
+    ("I'll have the pasta", "order"),
+])
+def test_carrier_phrases_do_not_outweigh_content_keywords(text, intent):
+    scenario = load_scenario("restaurant")
+    matcher = KeywordMatcher.from_scenario(scenario)
+    assert matcher.match(text) == intent
+    assert ConversationEngine.generate_response(scenario, matcher, text) == scenario["responses"][intent]
+
+
+def test_keywords_match_whole_words_only():
+    matcher = KeywordMatcher({"order": ["order"]})
+    assert matcher.match("We crossed the border") is None
+    assert matcher.match("Can I order now?") == "order"
+
+
+def test_repeated_keyword_counts_once():
+    matcher = KeywordMatcher({"drink": ["water"], "bill": ["bill", "pay"]})
+    assert matcher.scores("water water water, then pay the bill") == {"drink": 1, "bill": 2}
@@ -0,0 +1,35 @@
+import json
+import os
+
+from scenario_catalog import ScenarioCatalog
+
+
+def write_scenario(directory, file_name, scenario_id, key):
+    scenario = {"id": scenario_id, "key": key, "initial_prompt": "Hello!",
+                "responses": {"menu": "Here is the menu.", "default": "Sorry?"}}
+    with open(os.path.join(directory, file_name), "w", encoding="utf-8") as f:
+        json.dump(scenario, f)
+
+
+def test_ids_with_slashes_are_cached(tmp_path):
+    write_scenario(tmp_path, "restaurant.json", "fr/restaurant", "f")
+    ScenarioCatalog(str(tmp_path))
+    catalog = ScenarioCatalog(str(tmp_path))
+    assert catalog.matcher("fr/restaurant").match("the menu please") == "menu"
+    cache_files = os.listdir(tmp_path / ".cache")
+    assert len(cache_files) == 2 and not any(name.endswith(".tmp") for name in cache_files)
+
+
+def test_duplicate_ids_keep_the_first_file(tmp_path):
+    write_scenario(tmp_path, "a.json", "cafe", "c")
+    write_scenario(tmp_path, "b.json", "cafe", "x")
+    catalog = ScenarioCatalog(str(tmp_path))
+    assert catalog.index["cafe"]["path"].endswith("a.json")
+    assert catalog.key_bindings() == {"c": "cafe"}
+
+
+def test_malformed_files_are_skipped(tmp_path):
+    (tmp_path / "list.json").write_text("[]", encoding="utf-8")
+    (tmp_path / "no_body.json").write_text('{"name": "No body"}', encoding="utf-8")
+    write_scenario(tmp_path, "cafe.json", "cafe", "c")
+    assert list(ScenarioCatalog(str(tmp_path)).index) == ["cafe"]
@@ -0,0 +1,23 @@
+from vocabulary import INITIAL_INTERVAL, VocabularyTracker
+
+
+def test_due_lists_each_item_once_after_repeated_hearing():
+    tracker = VocabularyTracker()
+    line = "Welcome to our restaurant, here is the menu"
+    for _ in range(3):
+        tracker.hear("restaurant", line, now=0.0)
+    due = [item.term for item in tracker.due("restaurant", now=INITIAL_INTERVAL)]
+    assert sorted(due) == ["menu", "restaurant", "welcome"]
+
+
+def test_heap_stays_bounded_when_items_are_heard_every_turn():
+    tracker = VocabularyTracker()
+    line = "Welcome to our restaurant, here is the menu of specials"
+    for turn in range(2000):
+        tracker.observe("restaurant", "yes", line, True, now=float(turn))
+    heap = tracker._heaps["restaurant"]
+    assert len(heap) <= 2 * len(tracker) + 64
+    live = [item_id for due, item_id in heap if tracker.items[item_id].due == due]
+    assert len(live) == len(set(live)) == len(tracker)
+    due = [item.term for item in tracker.due("restaurant", now=1e9)]
+    assert len(due) == len(set(due))
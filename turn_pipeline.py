@@ -0,0 +1,278 @@
+import asyncio
+import functools
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Optional
+
+
+class Turn:
+    """One learner turn as it moves through the pipeline"""
+    __slots__ = ("generation", "started", "audio", "result", "text", "response", "evaluation",
+                 "timings", "pending", "partial_busy", "partial_audio", "cancelled", "done")
+
+    def __init__(self, generation: int):
+        self.generation = generation
+        self.started = time.perf_counter()
+        self.audio = None
+        self.result = None       # Final RecognitionResult
+        self.text = None
+        self.response = None
+        self.evaluation = None
+        self.timings = {}        # Stage name -> seconds
+        self.pending = 2         # Evaluate and speak both have to finish
+        self.partial_busy = False
+        self.partial_audio = None
+        self.cancelled = threading.Event()  # Set when dropped; a capture still running gives up
+        self.done = Future()     # Resolves to the turn, or None if it failed or was cancelled
+
+
+class TurnPipeline:
+    """Turn stages (capture → recognize → respond → evaluate/speak) as asyncio tasks.
+
+    The event loop runs in its own thread and blocking work (the microphone,
+    recognition, scoring) goes to a small thread pool. Stages hand turns on through
+    bounded queues, so a slow stage applies backpressure instead of piling up work;
+    scoring and speaking the reply run concurrently. While the learner is still
+    talking, the audio so far is recognized to stream partial transcripts.
+
+    cancel() abandons the turn in flight: speech stops and stale turns are dropped at
+    the next stage boundary. Progress is reported to on_event(kind, turn, data) on the
+    loop thread, which makes it the only writer of turn state.
+    """
+
+    def __init__(self, listen: Callable, recognize: Callable, respond: Callable, evaluate: Callable,
+                 speak: Callable, interrupt: Callable, on_event: Callable,
+                 recognize_partial: Optional[Callable] = None, queue_size: int = 1, max_workers: int = 4):
+        self.listen = listen          # listen(on_partial_audio, cancel_event) -> AudioData (blocking)
+        self.recognize = recognize    # recognize(audio) -> RecognitionResult (blocking)
+        # Interim transcripts: a cheaper recognize(audio) for the audio so far (defaults to recognize)
+        self.recognize_partial = recognize_partial or recognize
+        self.respond = respond        # respond(text) -> reply text
+        self.evaluate = evaluate      # evaluate(text, audio) -> Evaluation (blocking)
+        self.speak = speak            # speak(text, on_done) -> None, on_done called from any thread
+        self.interrupt = interrupt    # Stop speaking now
+        self.on_event = on_event
+        self.queue_size = queue_size
+
+        self.executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="pipeline")
+        self.loop = None
+        self.generation = 0
+        self._capturing_turn = None   # The turn being captured or recognized, if any
+        self._trigger_lock = threading.Lock()
+        self._thread = None
+        self._tasks = []
+
+    @property
+    def capturing(self) -> bool:
+        return self._capturing_turn is not None
+
+    def start(self) -> "TurnPipeline":
+        self.loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self.loop.run_forever, daemon=True, name="turn-pipeline")
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._setup(), self.loop).result()
+        return self
+
+    async def _setup(self):
+        # Queues are created on the loop that uses them
+        self._triggers = asyncio.Queue(self.queue_size)
+        self._recognize_queue = asyncio.Queue(self.queue_size)
+        self._respond_queue = asyncio.Queue(self.queue_size)
+        self._evaluate_queue = asyncio.Queue(self.queue_size)
+        self._speak_queue = asyncio.Queue(self.queue_size)
+        self._tasks = [asyncio.ensure_future(stage()) for stage in (
+            self._capture_stage, self._recognize_stage, self._respond_stage,
+            self._evaluate_stage, self._speak_stage)]
+
+    def stop(self):
+        """Cancel everything and stop the loop (blocking calls already running are abandoned)"""
+        if self.loop is None or self.loop.is_closed():
+            return
+        self.cancel()
+
+        async def shutdown():
+            for task in self._tasks:
+                task.cancel()
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+            self.loop.stop()
+
+        asyncio.run_coroutine_threadsafe(shutdown(), self.loop)
+        self._thread.join(timeout=2)
+        self.executor.shutdown(wait=False)
+
+    def trigger(self) -> Optional[Future]:
+        """Start capturing a turn; returns a future for its completion, or None if one is already being captured"""
+        with self._trigger_lock:
+            if self._capturing_turn is not None or self.loop is None:
+                return None
+            turn = self._capturing_turn = Turn(self.generation)
+        self.loop.call_soon_threadsafe(self._triggers.put_nowait, turn)
+        return turn.done
+
+    def cancel(self):
+        """Abandon the turn in flight and stop speaking; safe to call from any thread"""
+        self.generation += 1
+        capturing = self._capturing_turn
+        if capturing is not None:
+            capturing.cancelled.set()  # Unblock its capture right away; _drain drops it
+        self.interrupt()
+        if self.loop is not None:
+            self.loop.call_soon_threadsafe(self._drain)
+
+    def _drain(self):
+        # A capture still blocked on the microphone is abandoned too, so a new turn can start
+        if self._capturing_turn is not None and self._capturing_turn.generation != self.generation:
+            self._drop(self._capturing_turn)
+        for queue in (self._triggers, self._recognize_queue, self._respond_queue,
+                      self._evaluate_queue, self._speak_queue):
+            while not queue.empty():
+                self._drop(queue.get_nowait())
+
+    def _stale(self, turn: Turn) -> bool:
+        if turn.generation == self.generation:
+            return False
+        self._drop(turn)
+        return True
+
+    def _release(self, turn: Turn):
+        """The turn no longer holds the microphone; the next one may start"""
+        if self._capturing_turn is turn:
+            self._capturing_turn = None
+
+    def _drop(self, turn: Turn):
+        turn.cancelled.set()
+        self._release(turn)
+        if not turn.done.done():
+            turn.done.set_result(None)
+            self._emit("cancelled", turn, None)
+
+    def _fail(self, turn: Turn, error: Exception):
+        self._release(turn)
+        if not turn.done.done():
+            turn.done.set_result(None)
+            self._emit("failed", turn, error)
+
+    def _finish_part(self, turn: Turn):
+        if self._stale(turn):
+            return
+        turn.pending -= 1
+        if turn.pending == 0 and not turn.done.done():
+            turn.timings["turn"] = time.perf_counter() - turn.started
+            self._emit("done", turn, None)
+            turn.done.set_result(turn)
+
+    def _emit(self, kind: str, turn: Turn, data):
+        # A failing handler must not take the stage task down with it
+        try:
+            self.on_event(kind, turn, data)
+        except Exception as e:
+            print(f"Pipeline event error ({kind}): {e}")
+
+    def _run(self, func, *args):
+        return self.loop.run_in_executor(self.executor, functools.partial(func, *args))
+
+    async def _capture_stage(self):
+        while True:
+            turn = await self._triggers.get()
+            if self._stale(turn):
+                continue
+            self._emit("listening", turn, None)
+            started = time.perf_counter()
+            on_partial_audio = functools.partial(self.loop.call_soon_threadsafe, self._partial_audio, turn)
+            try:
+                turn.audio = await self._run(self.listen, on_partial_audio, turn.cancelled)
+            except Exception as e:
+                self._fail(turn, e)
+                continue
+            turn.timings["capture"] = time.perf_counter() - started
+            await self._recognize_queue.put(turn)
+
+    def _partial_audio(self, turn: Turn, audio):
+        # Only the latest audio is worth recognizing; one interim request at a time
+        turn.partial_audio = audio
+        if not turn.partial_busy:
+            turn.partial_busy = True
+            asyncio.ensure_future(self._recognize_partial(turn))
+
+    async def _recognize_partial(self, turn: Turn):
+        try:
+            while turn.partial_audio is not None and turn.text is None and turn.generation == self.generation:
+                audio, turn.partial_audio = turn.partial_audio, None
+                try:
+                    result = await self._run(self.recognize_partial, audio)
+                except Exception:
+                    continue  # Interim results are best effort
+                if turn.text is None and turn.generation == self.generation:
+                    self._emit("partial", turn, result.text)
+        finally:
+            turn.partial_busy = False
+
+    async def _recognize_stage(self):
+        while True:
+            turn = await self._recognize_queue.get()
+            if self._stale(turn):
+                continue
+            started = time.perf_counter()
+            try:
+                turn.result = await self._run(self.recognize, turn.audio)
+            except Exception as e:
+                self._fail(turn, e)
+                continue
+            turn.timings["recognize"] = time.perf_counter() - started
+            turn.text = turn.result.text
+            self._release(turn)
+            if self._stale(turn):
+                continue
+            self._emit("heard", turn, turn.result)
+            await self._respond_queue.put(turn)
+
+    async def _respond_stage(self):
+        while True:
+            turn = await self._respond_queue.get()
+            if self._stale(turn):
+                continue
+            started = time.perf_counter()
+            try:
+                turn.response = self.respond(turn.text)
+            except Exception as e:
+                self._fail(turn, e)
+                continue
+            turn.timings["respond"] = time.perf_counter() - started
+            self._emit("responded", turn, turn.response)
+            # Speaking starts without waiting for the (possibly slower) scoring
+            await self._speak_queue.put(turn)
+            await self._evaluate_queue.put(turn)
+
+    async def _evaluate_stage(self):
+        while True:
+            turn = await self._evaluate_queue.get()
+            if self._stale(turn):
+                continue
+            started = time.perf_counter()
+            try:
+                turn.evaluation = await self._run(self.evaluate, turn.text, turn.audio)
+            except Exception as e:
+                self._fail(turn, e)
+                continue
+            turn.timings["evaluate"] = time.perf_counter() - started
+            if self._stale(turn):
+                continue  # Cancelled while scoring; it must not land in the next scenario's history
+            self._emit("evaluated", turn, turn.evaluation)
+            self._finish_part(turn)
+
+    async def _speak_stage(self):
+        while True:
+            turn = await self._speak_queue.get()
+            if turn.generation == self.generation:
+                started = time.perf_counter()
+                spoken = self.loop.create_future()
+
+                def on_done(spoken=spoken):
+                    self.loop.call_soon_threadsafe(lambda: spoken.done() or spoken.set_result(None))
+
+                self.speak(turn.response, on_done)
+                await spoken
+                turn.timings["speak"] = time.perf_counter() - started
+                self._emit("spoken", turn, None)
+            self._finish_part(turn)
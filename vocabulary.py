@@ -0,0 +1,343 @@
+import heapq
+import mmap
+import os
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, List, Optional, Set, Tuple
+
+from keyword_matcher import KeywordMatcher, tokenize
+
+# File signature and format version
+MAGIC = b"VRVOC001"
+
+# The file is an append-only journal of two record types:
+#   b"N": a new item - item id, then the scenario id and term (UTF-8, lengths in front)
+#   b"U": an item's full scheduling state; the last one written for an item wins
+NEW_RECORD = struct.Struct("<cIBB")
+UPDATE_RECORD = struct.Struct(
+    "<c"   # b"U"
+    "I"    # item id
+    "II"   # times used by the learner, times heard from the AI
+    "HH"   # lapses, current streak of successful recalls
+    "ff"   # ease factor, review interval (seconds)
+    "d"    # wall-clock time the item is next due
+)
+
+# Spaced-repetition parameters (SM-2 style, with intervals in seconds)
+INITIAL_INTERVAL = 60.0
+MIN_EASE = 1.3
+MAX_EASE = 3.0
+DEFAULT_EASE = 2.5
+EASE_BONUS = 0.05    # Recalled in a correct sentence
+LAPSE_PENALTY = 0.2  # Prompted with the item but didn't use it
+MAX_INTERVAL = 180 * 24 * 3600.0
+
+# Words too common to be worth reviewing
+STOPWORDS = frozenset((
+    "the", "and", "for", "you", "your", "are", "was", "that", "this", "with", "have", "has", "but",
+    "not", "can", "could", "would", "will", "what", "how", "any", "all", "our", "its", "it's", "i'm",
+    "i'll", "that's", "there", "here", "then", "than", "they", "them", "from", "just", "some", "yes",
+))
+# Longest term (UTF-8 bytes) a journal record can hold
+MAX_TERM_BYTES = 255
+# A scenario response gets at most this many extra keyword hits of weight for due vocabulary
+REVIEW_BONUS_CAP = 2
+
+
+class VocabularyItem:
+    """A word or phrase of one scenario with its recall statistics and review schedule"""
+    __slots__ = ("id", "scenario", "term", "used", "heard", "lapses", "streak", "ease", "interval", "due")
+
+    def __init__(self, item_id: int, scenario: str, term: str):
+        self.id = item_id
+        self.scenario = scenario
+        self.term = term
+        self.used = 0
+        self.heard = 0
+        self.lapses = 0
+        self.streak = 0
+        self.ease = DEFAULT_EASE
+        self.interval = INITIAL_INTERVAL
+        self.due = 0.0
+
+    def pack(self) -> bytes:
+        return UPDATE_RECORD.pack(b"U", self.id, self.used, self.heard, min(self.lapses, 0xFFFF),
+                                  min(self.streak, 0xFFFF), self.ease, self.interval, self.due)
+
+
+class VocabularyTracker:
+    """Per-learner vocabulary with spaced-repetition review scheduling.
+
+    Every word and scenario keyword phrase the learner says or hears is tracked
+    per scenario. Using an item counts as a successful recall and pushes its next
+    review out by its ease factor; being prompted with a due item and not using it
+    is a lapse that resets the interval. Each scenario keeps a min-heap of due
+    times (stale entries are skipped lazily), so the next review items come out in
+    O(log n) per item however many items are tracked.
+
+    State is an append-only binary journal, so a turn writes only the items it
+    changed. load() replays the journal in the background at startup; turns
+    observed before it finishes are applied once it has.
+    """
+
+    def __init__(self, path: Optional[str] = None, compact_ratio: float = 3.0):
+        self.path = path
+        self.compact_ratio = compact_ratio  # Rewrite the journal once it has this many records per item
+        self.items: List[VocabularyItem] = []
+        self._index: Dict[Tuple[str, str], int] = {}
+        self._heaps: Dict[str, List[Tuple[float, int]]] = {}
+        self._prompted: Dict[str, Set[int]] = {}  # Scenario -> due items the last AI response contained
+        self._terms_cache = OrderedDict()         # (scenario, text) -> terms, for repeated scenario lines
+        self._pending = []                        # Turns observed before load() finished
+        self._journal = None
+        self._lock = threading.Lock()
+        self.loaded = threading.Event()
+        if path is None:
+            self.loaded.set()
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def load(self):
+        """Replay the journal (compacting it if it has grown) and start appending to it"""
+        try:
+            items, records, torn = self._read_journal()
+        except (OSError, ValueError) as e:
+            print(f"Vocabulary load error: {e}")
+            items, records, torn = [], 0, False
+
+        with self._lock:
+            self.items = items
+            self._index = {(item.scenario, item.term): item.id for item in items}
+            self._heaps = {}
+            for item in items:
+                self._heaps.setdefault(item.scenario, []).append((item.due, item.id))
+            for heap in self._heaps.values():
+                heapq.heapify(heap)
+            try:
+                # A torn tail is rewritten away too, or records appended after it would be unreachable
+                self._open_journal(compact=torn or records > self.compact_ratio * max(1, len(items)))
+            except OSError as e:
+                print(f"Vocabulary journal error: {e}")
+            pending, self._pending = self._pending, []
+            self.loaded.set()
+            for args in pending:
+                self._observe(*args)
+
+    def _read_journal(self) -> Tuple[List[VocabularyItem], int, bool]:
+        """Items, the number of records read and whether the journal ended in a partial record"""
+        try:
+            f = open(self.path, "rb")
+        except FileNotFoundError:
+            return [], 0, False
+        with f:
+            size = os.fstat(f.fileno()).st_size
+            if size <= len(MAGIC):
+                return [], 0, size > 0
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                if data[:len(MAGIC)] != MAGIC:
+                    raise ValueError(f"{self.path} is not a vocabulary journal")
+                items: List[VocabularyItem] = []
+                records = 0
+                offset = len(MAGIC)
+                # A record cut short by a crash (or otherwise unreadable) ends the journal
+                while offset < size:
+                    kind = data[offset:offset + 1]
+                    if kind == b"U" and offset + UPDATE_RECORD.size <= size:
+                        _, item_id, used, heard, lapses, streak, ease, interval, due = \
+                            UPDATE_RECORD.unpack_from(data, offset)
+                        offset += UPDATE_RECORD.size
+                        if item_id < len(items):
+                            item = items[item_id]
+                            item.used, item.heard, item.lapses, item.streak = used, heard, lapses, streak
+                            item.ease, item.interval, item.due = ease, interval, due
+                    elif kind == b"N" and offset + NEW_RECORD.size <= size:
+                        _, item_id, scenario_length, term_length = NEW_RECORD.unpack_from(data, offset)
+                        start = offset + NEW_RECORD.size
+                        end = start + scenario_length + term_length
+                        if end > size or item_id != len(items):
+                            break
+                        try:
+                            scenario = data[start:start + scenario_length].decode("utf-8")
+                            term = data[start + scenario_length:end].decode("utf-8")
+                        except UnicodeDecodeError:
+                            break  # Treated like a torn tail: keep what came before and compact
+                        items.append(VocabularyItem(item_id, scenario, term))
+                        offset = end
+                    else:
+                        break
+                    records += 1
+        return items, records, offset < size
+
+    def _open_journal(self, compact: bool):
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        if compact:
+            temporary = self.path + ".tmp"
+            with open(temporary, "wb") as f:
+                f.write(MAGIC)
+                for item in self.items:
+                    f.write(self._new_record(item) + item.pack())
+            os.replace(temporary, self.path)
+        self._journal = open(self.path, "ab")
+        if self._journal.tell() == 0:
+            self._journal.write(MAGIC)
+
+    @staticmethod
+    def _new_record(item: VocabularyItem) -> bytes:
+        # Lengths are one byte; cut on a character boundary so the text still decodes
+        scenario = item.scenario.encode("utf-8")[:MAX_TERM_BYTES].decode("utf-8", "ignore").encode("utf-8")
+        term = item.term.encode("utf-8")[:MAX_TERM_BYTES].decode("utf-8", "ignore").encode("utf-8")
+        return NEW_RECORD.pack(b"N", item.id, len(scenario), len(term)) + scenario + term
+
+    def close(self):
+        with self._lock:
+            if self._journal:
+                self._journal.close()
+                self._journal = None
+
+    def terms(self, scenario_id: str, text: str, matcher: Optional[KeywordMatcher] = None) -> Set[str]:
+        """Words worth reviewing in text, plus any multi-word scenario keyword phrases it contains (call with the lock held)"""
+        key = (scenario_id, text)
+        cached = self._terms_cache.get(key)
+        if cached is not None:
+            return cached
+        tokens = tokenize(text)
+        # A run of text too long for a journal record (e.g. unspaced CJK) isn't a reviewable item
+        found = {token for token in tokens if 2 < len(token) and len(token.encode("utf-8")) <= MAX_TERM_BYTES
+                 and token not in STOPWORDS and not token.isdigit()}
+        if matcher:
+            for _, start, length in matcher.find_all(text):
+                if length > 1:
+                    found.add(" ".join(tokens[start:start + length]))
+        self._terms_cache[key] = found
+        while len(self._terms_cache) > 256:
+            self._terms_cache.popitem(last=False)
+        return found
+
+    def due(self, scenario_id: str, limit: int = 20, now: Optional[float] = None) -> List[VocabularyItem]:
+        """Up to limit items of a scenario that are due for review, most overdue first"""
+        now = time.time() if now is None else now
+        with self._lock:
+            heap = self._heaps.get(scenario_id)
+            if not heap:
+                return []
+            found = []
+            seen = set()
+            while heap and len(found) < limit and heap[0][0] <= now:
+                due, item_id = heapq.heappop(heap)
+                # Stale entries and duplicates of a live one are dropped as they come out
+                if self.items[item_id].due == due and item_id not in seen:
+                    seen.add(item_id)
+                    found.append(self.items[item_id])
+            for item in found:
+                heapq.heappush(heap, (item.due, item.id))
+            return found
+
+    def reviewer(self, scenario_id: str, matcher: Optional[KeywordMatcher] = None,
+                 now: Optional[float] = None) -> Callable[[str], int]:
+        """Bonus for a candidate response: the number of due items it would let the learner hear (capped)"""
+        due_terms = {item.term for item in self.due(scenario_id, now=now)}
+
+        def review(text: str) -> int:
+            if not due_terms:
+                return 0
+            with self._lock:
+                terms = self.terms(scenario_id, text, matcher)
+            return min(REVIEW_BONUS_CAP, len(terms & due_terms))
+
+        return review
+
+    def observe(self, scenario_id: str, user_input: str, response: str, correct: bool,
+                matcher: Optional[KeywordMatcher] = None, now: Optional[float] = None):
+        """Update recall statistics for one turn: what the learner said, then the AI's reply"""
+        with self._lock:
+            args = (scenario_id, self.terms(scenario_id, user_input, matcher),
+                    self.terms(scenario_id, response, matcher), correct, time.time() if now is None else now)
+            if not self.loaded.is_set():
+                self._pending.append(args)
+                return
+            self._observe(*args)
+
+    def hear(self, scenario_id: str, text: str, matcher: Optional[KeywordMatcher] = None,
+             now: Optional[float] = None):
+        """Track the items in an AI line the learner heard outside a turn (e.g. a scenario's opening prompt)"""
+        with self._lock:
+            args = (scenario_id, set(), self.terms(scenario_id, text, matcher), True,
+                    time.time() if now is None else now)
+            if not self.loaded.is_set():
+                self._pending.append(args)
+                return
+            self._observe(*args)
+
+    def _observe(self, scenario_id: str, used: Set[str], heard: Set[str], correct: bool, now: float):
+        changed = {}
+        scheduled = {}  # Item id -> due time before this turn (None for items new this turn)
+        new_records = []
+        heap = self._heaps.setdefault(scenario_id, [])
+
+        for term in used:
+            item = self._item(scenario_id, term, now, new_records)
+            scheduled.setdefault(item.id, item.due if item.heard or item.used else None)
+            item.used += 1
+            if now >= item.due:
+                # Recalled when due: the next review moves out by the ease factor
+                item.interval = min(MAX_INTERVAL, item.interval * item.ease)
+                item.streak += 1
+                if correct:
+                    item.ease = min(MAX_EASE, item.ease + EASE_BONUS)
+            item.due = now + item.interval
+            changed[item.id] = item
+
+        for item_id in self._prompted.pop(scenario_id, ()):
+            item = self.items[item_id]
+            if item.term not in used:
+                scheduled.setdefault(item.id, item.due)
+                item.lapses += 1
+                item.streak = 0
+                item.ease = max(MIN_EASE, item.ease - LAPSE_PENALTY)
+                item.interval = INITIAL_INTERVAL
+                item.due = now + item.interval
+                changed[item.id] = item
+
+        prompted = set()
+        for term in heard:
+            item = self._item(scenario_id, term, now, new_records)
+            scheduled.setdefault(item.id, item.due if item.heard or item.used else None)
+            if item.heard and item.due <= now and term not in used:
+                prompted.add(item.id)
+            item.heard += 1
+            changed[item.id] = item
+        self._prompted[scenario_id] = prompted
+
+        # Only a new or rescheduled item needs a heap entry; its old one goes stale
+        for item_id, due in scheduled.items():
+            item = self.items[item_id]
+            if due is None or item.due != due:
+                heapq.heappush(heap, (item.due, item.id))
+        if len(heap) > 2 * len(self.items) + 64:
+            # Drop stale entries left behind by rescheduling, keeping one live entry per item
+            live = {item_id: due for due, item_id in heap if self.items[item_id].due == due}
+            heap[:] = [(due, item_id) for item_id, due in live.items()]
+            heapq.heapify(heap)
+
+        if self._journal and changed:
+            try:
+                self._journal.write(b"".join(new_records + [item.pack() for item in changed.values()]))
+                self._journal.flush()
+            except OSError as e:
+                print(f"Vocabulary journal error: {e}")
+
+    def _item(self, scenario_id: str, term: str, now: float, new_records: List[bytes]) -> VocabularyItem:
+        item_id = self._index.get((scenario_id, term))
+        if item_id is not None:
+            return self.items[item_id]
+        item = VocabularyItem(len(self.items), scenario_id, term)
+        item.due = now + item.interval
+        self.items.append(item)
+        self._index[(scenario_id, term)] = item.id
+        new_records.append(self._new_record(item))
+        return item